@@ -55,14 +55,21 @@ class CheckpointCallback(Callback):
         点继续训练。如果保存的是 ``Model`` 对象，则可以通过 :meth:`Trainer.load_model` 加载该模型权重。
     :param save_evaluate_results: 是否保存 evaluate 的结果。如果为 ``True`` ，在保存 topk 模型的 folder 中还将额外保存一个
         ``fastnlp_evaluate_results.json`` 文件，记录当前的 results。仅在设置了 ``topk`` 的场景下有用，默认为 ``True`` 。
-    :param kwargs:
+    :param async_save: 是否异步保存。为 ``True`` 时，模型会被同步地序列化到内存中，再交由一个后台线程写入磁盘，训练过程无需等待写盘完成；
+        在训练结束时会等待所有写入完成。写盘在 rank 0 的后台线程中进行，训练脚本不需要 ``if __name__ == '__main__'`` 的保护；写盘失败的异常
+        会在之后的保存或者训练结束时抛出，如果训练本身已经因为异常而中断，则只会记录写盘的异常而不会覆盖原来的异常。仅在
+        ``save_object='model'`` 且 ``model_save_fn`` 为 ``None`` 时生效，并且只支持 pytorch 的 driver（不包括 deepspeed 、 fsdp 与
+        fairscale）以及 ``only_state_dict=True`` 时的 paddle 的 driver ，其它情况下会退化为同步保存，默认为 ``False`` 。
+    :param kwargs: 更多需要传递给 :meth:`Trainer.save_checkpoint` 或者 :meth:`Trainer.save_model` 接口的参数；例如在 ``save_object='model'``
+        时，可以通过 ``save_dtype=torch.bfloat16`` 将 **pytorch** 模型的浮点权重转换为 ``bfloat16`` 后再保存；在 ``save_object='trainer'``
+        时，可以通过 ``optimizer_save_dtype=torch.bfloat16`` 将 **pytorch** 优化器的浮点状态转换为 ``bfloat16`` 后再保存。
     """
     def __init__(self, folder: Optional[Union[str, Path]] = None, every_n_epochs: Optional[int] = None,
                  every_n_batches: Optional[int] = None, last: bool = False, topk: int = 0,
                  on_exceptions: Optional[Union[BaseException, Sequence[BaseException]]] = (EarlyStopException),
                  monitor: Optional[Union[str, Callable]] = None, larger_better: bool = True,
                  only_state_dict: bool = True, model_save_fn: Optional[Callable] = None, save_object: str = 'model',
-                 save_evaluate_results=True, **kwargs):
+                 save_evaluate_results=True, async_save: bool = False, **kwargs):
         super().__init__()
         if every_n_epochs is not None:
             if not isinstance(every_n_epochs, int) or every_n_epochs < 1:
@@ -89,7 +96,7 @@ class CheckpointCallback(Callback):
 
         self.topk_saver = TopkSaver(topk=topk, monitor=monitor, larger_better=larger_better, folder=folder,
                                     save_object=save_object, only_state_dict=only_state_dict, model_save_fn=model_save_fn,
-                                    save_evaluate_results=save_evaluate_results, **kwargs)
+                                    save_evaluate_results=save_evaluate_results, async_save=async_save, **kwargs)
         self.topk_saver.log_name = self.__class__.__name__
 
         self.topk = topk
@@ -99,6 +106,8 @@ class CheckpointCallback(Callback):
         self.every_n_batches = every_n_batches
         self.last = last
         self.exceptions = on_exceptions
+        # 训练是否因为异常而结束；此时 on_train_end 中不能再抛出新的异常覆盖原来的异常，也不能再进行 barrier
+        self._exception_raised = False
 
     @property
     def need_reproducible_sampler(self) -> bool:
@@ -128,12 +137,48 @@ class CheckpointCallback(Callback):
             folder_name = f'{self.save_object}-epoch_{trainer.cur_epoch_idx}-batch_{trainer.global_forward_batches}'
             self.topk_saver.save(trainer, folder_name=folder_name)
 
+    def on_train_begin(self, trainer):
+        self._exception_raised = False
+        self.topk_saver.forget_last_saved()
+
+    def on_load_model(self, trainer):
+        # 重新加载模型后不能再硬链接之前保存的模型文件；
+        self.topk_saver.forget_last_saved()
+
     def on_exception(self, trainer, exception: BaseException):
+        if not isinstance(exception, EarlyStopException):
+            self._exception_raised = True
         if exception.__class__ in self.exceptions:
             folder_name = f'{self.save_object}-epoch_{trainer.cur_epoch_idx}-batch_{trainer.global_forward_batches}-' \
                           f'exception_{exception.__class__.__name__}'
             self.topk_saver.save(trainer, folder_name=folder_name)
 
+    def on_train_end(self, trainer):
+        # 等待后台线程把所有的保存写入磁盘，保证 trainer.run() 返回之后所有 rank 都可以读到保存的模型；
+        if self.topk_saver.async_saver is None:
+            return
+        error = None
+        try:
+            self.topk_saver.wait_async_save()
+        except BaseException as e:
+            error = e
+        if self._exception_raised:
+            # 训练已经因为异常而中断，其它 rank 不一定还能到达 barrier ；写盘的异常只记录下来，保证原来的异常能够被正常抛出；
+            if error is not None:
+                logger.error(f"Failed to save checkpoint asynchronously: {error!r}.")
+            return
+        # 写盘只发生在 rank 0 上，先 barrier 再抛出写盘的异常，避免其它 rank 一直等待在 barrier 中；
+        trainer.driver.barrier()
+        if error is not None:
+            raise error
+
+    @property
+    def topk_paths(self) -> Dict[str, Path]:
+        """
+        当前处于 topk 的所有保存文件夹，key 为文件夹的名字，value 为对应的路径，按照 ``monitor`` 的结果由好到差排列；
+        """
+        return self.topk_saver.topk_paths
+
     def on_save_checkpoint(self, trainer) -> Dict:
         states = {}
         states['topk_saver'] = self.topk_saver.state_dict()
@@ -142,4 +187,5 @@ class CheckpointCallback(Callback):
     def on_load_checkpoint(self, trainer, states: Optional[Dict]):
         topk_saver_states = states['topk_saver']
         self.topk_saver.load_state_dict(topk_saver_states)
+        self.topk_saver.forget_last_saved()
 
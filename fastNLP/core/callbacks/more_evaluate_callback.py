@@ -186,9 +186,14 @@ class MoreEvaluateCallback(HasMonitorCallback):
             states['monitor_value'] = self.monitor_value
         return states
 
+    def on_load_model(self, trainer):
+        # 重新加载模型后不能再硬链接之前保存的模型文件；
+        self.topk_saver.forget_last_saved()
+
     def on_load_checkpoint(self, trainer, states: Optional[Dict]):
         topk_saver_states = states['topk_saver']
         self.topk_saver.load_state_dict(topk_saver_states)
+        self.topk_saver.forget_last_saved()
         if '_real_monitor' in states:
             self._real_monitor = states["_real_monitor"]
             self.monitor_value = states['monitor_value']
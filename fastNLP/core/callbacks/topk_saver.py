@@ -1,8 +1,11 @@
 __all__ = [
     'TopkSaver'
 ]
+import io
 import json
 import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from pathlib import Path
 from typing import Optional, Dict, Tuple, Callable, Union
@@ -11,10 +14,93 @@ from ...envs.distributed import rank_zero_rm
 from fastNLP.core.log import logger
 from fastNLP.envs import FASTNLP_LAUNCH_TIME
 from fastNLP.envs import rank_zero_call
-from fastNLP.envs.env import FASTNLP_EVALUATE_RESULT_FILENAME
+from fastNLP.envs.env import FASTNLP_EVALUATE_RESULT_FILENAME, FASTNLP_MODEL_FILENAME
+from fastNLP.core.drivers import TorchDriver, DeepSpeedDriver, TorchFSDPDriver, FairScaleDriver, PaddleDriver
 from .has_monitor_callback import ResultsMonitor
 
 
+def _async_write(path: str, payload: bytes):
+    """
+    在后台线程中将 ``payload`` 写入 ``path`` ；先写入临时文件再替换，避免读取到只写了一半的文件。
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def _async_rm(path: str):
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _link_or_copy(src: str, dst: str):
+    """
+    将 ``src`` 以硬链接的方式放到 ``dst`` ，在文件系统不支持硬链接时退化为拷贝；``dst`` 如果已经存在会先被删除。
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+_ASYNC_SAVE_EXECUTOR = None
+
+
+def _get_async_save_executor() -> ThreadPoolExecutor:
+    """
+    返回全局共享的写盘线程池；线程池只有一个 worker ，因此提交的任务会严格按照提交的顺序执行，先提交的写入一定会在之后提交的删除之前
+    完成。写盘时会释放 GIL ，因此使用线程即可与训练并行。这里没有使用进程池：序列化后的模型需要再被 pickle 一次才能传给子进程，
+    ``spawn`` 方式启动子进程也有较大的开销，并且会重新 import ``__main__`` ；线程则对训练脚本没有额外的要求。线程池在第一次使用时才
+    创建，并在之后的多次训练中复用。
+    """
+    global _ASYNC_SAVE_EXECUTOR
+    if _ASYNC_SAVE_EXECUTOR is None:
+        _ASYNC_SAVE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='fastnlp_async_save')
+    return _ASYNC_SAVE_EXECUTOR
+
+
+class _AsyncSaveWorker:
+    """
+    将磁盘写入与删除提交给后台写盘线程；主线程只负责将需要保存的内容序列化到内存中。调用 :meth:`join` 会等待所有已提交的任务完成，
+    并将后台线程中出现的异常重新抛出；每次 :meth:`submit` 时也会检查已经完成的任务，尽早抛出之前写入失败的异常。
+    """
+    def __init__(self):
+        self._futures = []
+
+    def _check_finished(self):
+        pending = []
+        for future in self._futures:
+            if not future.done():
+                pending.append(future)
+            elif future.exception() is not None:
+                self._futures = []
+                raise future.exception()
+        self._futures = pending
+
+    def submit(self, op: str, path: str, payload: Optional[bytes] = None):
+        self._check_finished()
+        executor = _get_async_save_executor()
+        if op == 'write':
+            future = executor.submit(_async_write, path, payload)
+        elif op == 'link':
+            future = executor.submit(_link_or_copy, payload, path)
+        else:
+            future = executor.submit(_async_rm, path)
+        self._futures.append(future)
+
+    def join(self):
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def __getstate__(self):
+        # future 无法被复制，复制后的对象只等待自己之后提交的任务；
+        return {'_futures': []}
+
+
 class Saver:
     """
     执行保存的对象。保存的文件组织结构为::
@@ -30,10 +116,16 @@ class Saver:
     :param only_state_dict: 保存时是否仅保存权重，在 model_save_fn 不为 None 时无意义。
     :param model_save_fn: 个性化的保存函数，当触发保存操作时，就调用这个函数，这个函数应当接受一个文件夹作为参数，不返回任何东西。
         如果传入了 model_save_fn 函数，fastNLP 将不再进行模型相关的保存。在多卡场景下，我们只在 rank 0 上会运行该函数。
+    :param async_save: 是否异步保存。为 ``True`` 时，模型会先被同步地序列化到内存中，之后由一个后台线程负责写入磁盘，训练无需等待写盘
+        完成；过期 topk 文件夹的删除也会交给该线程按顺序执行。由于使用的是线程而不是进程，训练脚本不需要 ``if __name__ == '__main__'``
+        的保护。在写入完成之前，序列化后的内容会一直占用内存。写盘时出现的异常会在下一次保存或者调用 :meth:`wait_async_save` 时抛出。
+        仅在 ``save_object='model'`` 且 ``model_save_fn`` 为 ``None`` 时生效，需要调用 :meth:`wait_async_save` 来等待所有写入完成；
+        此外只支持 pytorch 的 driver（不包括 deepspeed 、 fsdp 与 fairscale）以及 ``only_state_dict=True`` 时的 paddle 的 driver ，其它
+        driver 会退化为同步保存。
     :param kwargs: 更多需要传递给 Trainer.save_checkpoint() 或者 Trainer.save_model() 接口的参数。
     """
     def __init__(self, folder:str=None, save_object:str='model', only_state_dict:bool=True,
-                 model_save_fn:Callable=None, **kwargs):
+                 model_save_fn:Callable=None, async_save:bool=False, **kwargs):
         if folder is None:
             folder = Path.cwd().absolute()
         folder = Path(folder)
@@ -48,6 +140,15 @@ class Saver:
         self.kwargs = kwargs
         self.save_object = save_object
         self.save_fn_name = 'save_checkpoint' if save_object == 'trainer' else 'save_model'
+        if async_save and (save_object == 'trainer' or model_save_fn is not None):
+            logger.rank_zero_warning("`async_save` only takes effect when `save_object='model'` and `model_save_fn` is None, "
+                                     "checkpoints will be saved synchronously.")
+            async_save = False
+        self.async_saver = _AsyncSaveWorker() if async_save else None
+        # 同一个 global_forward_batches 下保存的模型是完全一样的（例如 epoch 结束时的保存、last 以及紧接着 evaluate 后的 topk 保存），
+        #  此时直接硬链接上一次保存的模型文件而不再重复保存；只记录 (global_forward_batches, folder)，在 folder 被删除或者模型被重新
+        #  加载（见 :meth:`forget_last_saved` ）时清空；
+        self._last_saved = None
 
         self.timestamp_path = self.folder.joinpath(os.environ[FASTNLP_LAUNCH_TIME])
         # 打印这次运行时 checkpoint 所保存在的文件夹，因为这个文件夹是根据时间实时生成的，因此需要打印出来防止用户混淆；
@@ -67,16 +168,90 @@ class Saver:
         """
         folder = self.timestamp_path.joinpath(folder_name)
         folder.mkdir(parents=True, exist_ok=True)
-
-        save_fn = getattr(trainer, self.save_fn_name)
-        save_fn(
-            folder=folder,
-            only_state_dict=self.only_state_dict,
-            model_save_fn=self.model_save_fn,
-            **self.kwargs
-        )
+        model_path = folder.joinpath(FASTNLP_MODEL_FILENAME)
+
+        if self.async_saver is not None and not self._saves_single_file(trainer):
+            logger.rank_zero_warning(f"`async_save` is not supported by {trainer.driver.__class__.__name__} with "
+                                     f"`only_state_dict={self.only_state_dict}`, checkpoints will be saved synchronously.")
+            self.async_saver.join()
+            self.async_saver = None
+
+        can_link = self._can_link(trainer)
+        if can_link and self._last_saved is not None and self._last_saved[0] == trainer.global_forward_batches \
+                and self._last_saved[1] != folder:
+            src = str(self._last_saved[1].joinpath(FASTNLP_MODEL_FILENAME))
+            # 与 Trainer.save_model 保持一致，同样触发 on_save_model 并在前后进行 barrier ；
+            trainer.on_save_model()
+            trainer.driver.barrier()
+            if self.async_saver is not None:
+                self._async_submit('link', str(model_path), src)
+            else:
+                rank_zero_call(_link_or_copy)(src, str(model_path))
+            trainer.driver.barrier()
+            return str(os.path.abspath(folder))
+
+        if self.async_saver is not None:
+            buffer = io.BytesIO()
+            trainer.save_model(folder=buffer, only_state_dict=self.only_state_dict, **self.kwargs)
+            self._async_submit('write', str(model_path), buffer.getvalue())
+        else:
+            if can_link:
+                # 该文件可能是其它文件夹的硬链接，直接覆盖写入会同时修改其它文件夹中的模型；
+                rank_zero_call(self._unlink)(model_path)
+            save_fn = getattr(trainer, self.save_fn_name)
+            save_fn(
+                folder=folder,
+                only_state_dict=self.only_state_dict,
+                model_save_fn=self.model_save_fn,
+                **self.kwargs
+            )
+        if can_link:
+            self._last_saved = (trainer.global_forward_batches, folder)
         return str(os.path.abspath(folder))
 
+    def _saves_single_file(self, trainer) -> bool:
+        """
+        当前 driver 的 save_model 是否只会在 rank 0 上保存单个文件。torch 总是如此，paddle 只有在 ``only_state_dict=True`` 时如此
+        （否则使用 ``paddle.jit.save`` 保存多个文件）；deepspeed 保存的是一个文件夹，fsdp 与 fairscale 可能在每个 rank 上各自保存一个
+        文件，jittor 与 oneflow 等其它 driver 也不支持保存到内存中。
+        """
+        if isinstance(trainer.driver, (DeepSpeedDriver, TorchFSDPDriver, FairScaleDriver)):
+            return False
+        if isinstance(trainer.driver, PaddleDriver):
+            return self.only_state_dict
+        return isinstance(trainer.driver, TorchDriver)
+
+    def _can_link(self, trainer) -> bool:
+        """
+        是否可以通过硬链接复用之前保存的模型文件；只有 ``only_state_dict=True`` 并且模型被保存为单个文件时才进行硬链接。
+        """
+        if self.save_object != 'model' or self.model_save_fn is not None or not self.only_state_dict:
+            return False
+        return self._saves_single_file(trainer)
+
+    def forget_last_saved(self):
+        """
+        清空上一次保存的记录，之后的保存一定会重新写入模型文件；在模型被重新加载之后需要调用，因为此时即使 ``global_forward_batches``
+        相同，模型也可能与之前保存的不一样。
+        """
+        self._last_saved = None
+
+    @staticmethod
+    def _unlink(path: Path):
+        if os.path.lexists(path):
+            os.remove(path)
+
+    @rank_zero_call
+    def _async_submit(self, op, path, payload=None):
+        self.async_saver.submit(op, path, payload)
+
+    def wait_async_save(self):
+        """
+        等待所有异步提交的保存与删除操作完成；在未开启 ``async_save`` 时不做任何操作。
+        """
+        if self.async_saver is not None:
+            self.async_saver.join()
+
     @rank_zero_call
     def save_json(self, results, path):
         """
@@ -89,16 +264,22 @@ class Saver:
         with open(path, 'w', encoding='utf8') as f:
             json.dump(results, f, indent=2)
 
-    @rank_zero_call
     def rm(self, folder_name):
         """
-        移除 folder/timestamp/folder_name 。其中 folder 为用户在初始化指定, timestamp 为当前脚本的启动时间。
+        移除 folder/timestamp/folder_name 。其中 folder 为用户在初始化指定, timestamp 为当前脚本的启动时间。实际的删除只会在 rank 0
+        上进行。
 
         :param folder_name: 需要移除的路径。
         :return:
         """
         folder = self.timestamp_path.joinpath(folder_name)
-        rank_zero_rm(folder)
+        if self._last_saved is not None and self._last_saved[1] == folder:
+            self._last_saved = None
+        if self.async_saver is not None:
+            # 与写入放在同一个队列中，保证不会先删除还未写完的文件夹；
+            self._async_submit('rm', str(folder))
+        else:
+            rank_zero_rm(folder)
 
     def state_dict(self):
         states = {
@@ -144,6 +325,8 @@ class TopkQueue:
         if value is None:
             return key, value
         if self.topk < 0:
+            # 所有数据都满足 topk ，同样记录下来，使得 TopkSaver.topk_paths 可以返回所有保存的文件夹；
+            self.topk_dict[key] = value
             return None, None
         if self.topk == 0:
             return key, value
@@ -201,15 +384,16 @@ class TopkSaver(ResultsMonitor, Saver):
         如果传入了 ``model_save_fn`` 函数，fastNLP 将不再进行模型相关的保存。在多卡场景下，我们只在 rank 0 上会运行该函数。
     :param save_evaluate_results: 是否保存 evaluate 的结果。如果为 True ，在保存 topk 模型的 folder 中还将额外保存一个
         ``fastnlp_evaluate_results.json`` 文件，记录当前的 metric results 。仅在设置了 ``topk`` 的场景下有用，默认为 True 。
+    :param async_save: 是否由后台线程异步写盘，详见 :class:`Saver` 。
     :param kwargs: 更多需要传递给 :meth:`Trainer.save_checkpoint` 或者 :meth:`Trainer.save_model` 接口的参数。
     """
     def __init__(self, topk:int=0, monitor:str=None, larger_better:bool=True, folder:str=None, save_object:str='model',
                  only_state_dict:bool=True, model_save_fn:Callable=None, save_evaluate_results:bool=True,
-                 **kwargs):
+                 async_save:bool=False, **kwargs):
         if topk is None:
             topk = 0
         ResultsMonitor.__init__(self, monitor, larger_better)
-        Saver.__init__(self, folder, save_object, only_state_dict, model_save_fn, **kwargs)
+        Saver.__init__(self, folder, save_object, only_state_dict, model_save_fn, async_save, **kwargs)
 
         if monitor is not None and topk == 0:
             raise RuntimeError("`monitor` is set, but `topk` is 0.")
@@ -250,6 +434,17 @@ class TopkSaver(ResultsMonitor, Saver):
                 self.rm(pop_key)
             return folder
 
+    @property
+    def topk_paths(self) -> Dict[str, Path]:
+        """
+        当前处于 topk 的所有保存文件夹，key 为文件夹的名字，value 为对应的路径，按照 ``monitor`` 的结果由好到差排列。``topk=-1`` 时
+        包含所有通过 topk 保存的文件夹；``topk=0`` 时为空。
+
+        :return:
+        """
+        topk_dict = self.topk_queue.topk_dict
+        return {name: self.timestamp_path.joinpath(name) for name in sorted(topk_dict, key=topk_dict.get, reverse=True)}
+
     def state_dict(self):
         states = {
             'topk_queue': self.topk_queue.state_dict(),
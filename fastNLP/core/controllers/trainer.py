@@ -1058,6 +1058,7 @@ class Trainer(TrainerEventTrigger):
         :param model_save_fn: 您自己定制的用来替换该保存函数本身保存逻辑的函数，当您传入了该参数后，我们会实际调用该函数，而不会去调用 ``driver`` 的 ``save_model`` 函数；
         :kwargs: 
             * *input_spec* -- 该参数详见 **PaddlePaddle** 框架的保存函数 :meth:`~fastNLP.core.drivers.PaddleDriver.save_model` 中的说明；
+            * *save_dtype* -- 该参数详见 **pytorch** 框架的保存函数 :meth:`~fastNLP.core.drivers.TorchDriver.save_model` 中的说明；
 
         .. note::
 
@@ -1146,6 +1147,7 @@ class Trainer(TrainerEventTrigger):
             参数），不需要返回值；这意味着您可以通过该函数来自己负责模型的保存过程，而我们则会将 ``trainer`` 的状态保存好；
         :kwargs: 
             * *input_spec* -- 该参数详见 **PaddlePaddle** 框架的保存函数 :meth:`~fastNLP.core.drivers.PaddleDriver.save_model` 中的说明；
+            * *optimizer_save_dtype* -- 该参数详见 **pytorch** 框架的保存函数 :meth:`~fastNLP.core.drivers.TorchDriver.save_checkpoint` 中的说明；
 
         .. note::
 
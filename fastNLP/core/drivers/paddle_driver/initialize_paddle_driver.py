@@ -1,21 +1,70 @@
 import os
+import functools
 
-from typing import Optional, List, Sequence, Union
+from typing import Optional, List, Sequence, Union, Tuple
 
 from .paddle_driver import PaddleDriver
 from .single_device import PaddleSingleDriver
 from .fleet import PaddleFleetDriver
 
-from fastNLP.envs.imports import _NEED_IMPORT_PADDLE
 from fastNLP.envs.env import USER_CUDA_VISIBLE_DEVICES
 from fastNLP.core.utils import is_in_paddle_launch_dist, get_paddle_gpu_str
 from fastNLP.core.log import logger
 
-if _NEED_IMPORT_PADDLE:
-    import paddle
-
 __all__ = []
 
+def _split_visible_devices(visible_devices: str) -> List[str]:
+    """
+    将 ``CUDA_VISIBLE_DEVICES`` 格式的字符串切分为去除了首尾空白的 token 列表。
+    """
+    return [token.strip() for token in visible_devices.split(",")]
+
+def _parse_visible_devices(visible_devices: str) -> List[int]:
+    """
+    解析 ``CUDA_VISIBLE_DEVICES`` 格式的字符串。当所有 token 均为数字时返回对应的 int 列表；否则（例如包含
+    ``GPU-xxxx`` 形式的 UUID 或 MIG 设备名）与 CUDA 的行为一致，按照 token 所在的位置返回逻辑编号::
+
+        >>> _parse_visible_devices("0, 2,3")
+        [0, 2, 3]
+        >>> _parse_visible_devices("GPU-8932f937,GPU-e3a1b3c2")
+        [0, 1]
+
+    :param visible_devices: ``CUDA_VISIBLE_DEVICES`` 格式的字符串；
+    :return: 解析得到的设备编号列表；
+    """
+    tokens = _split_visible_devices(visible_devices)
+    if all(token.isdigit() for token in tokens):
+        return [int(token) for token in tokens]
+    return list(range(len(tokens)))
+
+@functools.lru_cache(maxsize=4)
+def _resolve_visible_device_count(user_visible_devices: Optional[str], cuda_visible_devices: Optional[str]) -> int:
+    """
+    根据环境变量计算当前可以使用的 gpu 数目；由于 ``paddle.device.cuda.device_count()`` 会调用 CUDA runtime，这里
+    以两个环境变量的值作为 key 进行缓存，只有当环境变量发生变化时才会重新计算。
+
+    :param user_visible_devices: 环境变量 ``USER_CUDA_VISIBLE_DEVICES`` 的值；
+    :param cuda_visible_devices: 环境变量 ``CUDA_VISIBLE_DEVICES`` 的值，仅作为缓存的 key 使用；
+    :return: 可以使用的 gpu 数目；
+    """
+    if user_visible_devices is None:
+        # 仅在确实需要查询 CUDA 设备数目时才导入 paddle
+        import paddle
+        return paddle.device.cuda.device_count()
+    return len(_parse_visible_devices(user_visible_devices))
+
+@functools.lru_cache(maxsize=4)
+def _resolve_launch_devices(user_visible_devices: str, cuda_visible_devices: str) -> Tuple[str, ...]:
+    """
+    在 ``python -m paddle.distributed.launch`` 拉起的进程中，根据环境变量计算当前进程对应的设备，结果会被缓存。
+
+    :param user_visible_devices: 环境变量 ``USER_CUDA_VISIBLE_DEVICES`` 的值；
+    :param cuda_visible_devices: 环境变量 ``CUDA_VISIBLE_DEVICES`` 的值；
+    :return: ``gpu:x`` 格式的设备名组成的 tuple；
+    """
+    _visible_list = _split_visible_devices(user_visible_devices)
+    return tuple(f"gpu:{_visible_list.index(g)}" for g in _split_visible_devices(cuda_visible_devices))
+
 def initialize_paddle_driver(driver: str, device: Optional[Union[str, int, List[int]]],
                             model: "paddle.nn.Layer", **kwargs) -> PaddleDriver:
     r"""
@@ -42,15 +91,11 @@ def initialize_paddle_driver(driver: str, device: Optional[Union[str, int, List[
         if device is not None:
             logger.rank_zero_warning("Parameter `device` would be ignored when you are using `paddle.distributed.launch` to pull "
                            "up your script. And we will directly get the local device via environment variables.", once=True)
-        _visible_list = user_visible_devices.split(",")
-        device = [ f"gpu:{_visible_list.index(g) }" for g in os.environ["CUDA_VISIBLE_DEVICES"].split(",")]
+        device = _resolve_launch_devices(user_visible_devices, os.environ["CUDA_VISIBLE_DEVICES"])
         # TODO 目前一个进程仅对应一个卡，所以暂时传入单个
         return PaddleFleetDriver(model, device[0], True, **kwargs)
 
-    if user_visible_devices is None:
-        _could_use_device_num = paddle.device.cuda.device_count()
-    else:
-        _could_use_device_num = len(user_visible_devices.split(","))
+    _could_use_device_num = _resolve_visible_device_count(user_visible_devices, os.getenv("CUDA_VISIBLE_DEVICES"))
 
     if isinstance(device, int):
         if device < 0 and device != -1:
@@ -60,8 +105,9 @@ def initialize_paddle_driver(driver: str, device: Optional[Union[str, int, List[
         if device == -1:
             device = [ get_paddle_gpu_str(g) for g in range(_could_use_device_num)]
     elif isinstance(device, Sequence) and not isinstance(device, str):
-        device = list(set(device))
-        for each in device:
+        # 使用 dict 去重以保留用户传入的顺序，进程的 rank 与设备的对应关系依赖于该顺序
+        _device = []
+        for each in dict.fromkeys(device):
             if not isinstance(each, int):
                 raise ValueError("When parameter `device` is 'Sequence' type, the value in it should be 'int' type.")
             elif each < 0:
@@ -69,7 +115,8 @@ def initialize_paddle_driver(driver: str, device: Optional[Union[str, int, List[
             elif each >= _could_use_device_num:
                 raise ValueError("When parameter `device` is 'Sequence' type, the value in it should not be bigger than"
                                  " the available gpu number.")
-        device = [get_paddle_gpu_str(g) for g in device]
+            _device.append(get_paddle_gpu_str(each))
+        device = _device
     elif device is not None and not isinstance(device, str):
         raise ValueError("Parameter `device` is wrong type, please check our documentation for the right use.")
     
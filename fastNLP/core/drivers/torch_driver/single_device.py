@@ -39,6 +39,8 @@ class TorchSingleDriver(TorchDriver):
         * *set_grad_to_none* -- 是否在训练过程中在每一次 optimizer 更新后将 grad 置为 ``None``
         * *non_blocking* -- 表示用于 :meth:`torch.Tensor.to` 方法的参数 non_blocking
         * *gradscaler_kwargs* -- 用于 ``fp16=True`` 时，提供给 :class:`torch.amp.cuda.GradScaler` 的参数
+        * *reuse_save_buffers* -- 是否在多次保存模型时复用同一份 cpu 张量（gpu 上的模型对应 pinned memory ）来拷贝权重；复用可以减少
+          每次保存时申请内存的开销，但会一直占用一份与模型同样大小的内存，默认为 ``False``
     :kwargs:
         * *wo_auto_param_call* (``bool``) -- 是否关闭在训练时调用我们的 ``auto_param_call`` 函数来自动匹配 batch 和前向函数的参数的行为
 
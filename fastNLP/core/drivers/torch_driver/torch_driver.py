@@ -1,10 +1,11 @@
 import os
+import pickle
 from typing import Union, Dict, Optional, Callable
 from functools import partial
 import numpy as np
 import random
 from dataclasses import dataclass
-from fastNLP.envs.imports import _NEED_IMPORT_TORCH
+from fastNLP.envs.imports import _NEED_IMPORT_TORCH, _TORCH_GREATER_EQUAL_2_1
 from pathlib import Path
 if _NEED_IMPORT_TORCH:
     import torch
@@ -23,7 +24,7 @@ __all__ = [
     'TorchDriver'
 ]
 
-from .utils import optimizer_state_to_device
+from .utils import optimizer_state_to_device, _optimizer_state_to_dtype
 from fastNLP.core.drivers.driver import Driver
 from fastNLP.core.drivers.torch_driver.utils import _build_fp16_env, DummyGradScaler
 from fastNLP.core.utils import apply_to_collection, torch_move_data_to_device
@@ -69,6 +70,14 @@ class TorchDriver(Driver):
         # 用来设置是否关闭 auto_param_call 中的参数匹配问题；
         self.wo_auto_param_call = kwargs.get("model_wo_auto_param_call", False)
 
+        # 保存模型时使用的 save plan 与对应的 cpu 张量，详见 `_get_cpu_state_dict`；只有在 reuse_save_buffers 为 True 时才会保留，
+        # 否则每次保存后就释放，不会一直占用一份与模型同样大小的内存；
+        self._reuse_save_buffers = self._torch_kwargs.get("reuse_save_buffers", False)
+        self._save_plan = None
+        self._save_buffers = None
+        # 每个 gpu 上用于将模型拷贝到 cpu 的 stream ；
+        self._save_copy_streams = {}
+
     def zero_grad(self):
         """
         实现梯度置零的过程
@@ -165,12 +174,15 @@ class TorchDriver(Driver):
 
         :param filepath: 保存文件的文件位置
         :param only_state_dict: 是否只保存权重
+        :kwargs:
+            * *save_dtype* -- 仅在 ``only_state_dict`` 为 ``True`` 时有效；若不为 ``None`` ，浮点类型的权重会被转换为该类型（例如
+              ``torch.bfloat16``）后再保存，从而减少保存的数据量；加载时会自动转换回模型参数本身的类型；
         :return:
         """
         model = self.unwrap_model()
 
         if only_state_dict:
-            states = {name: param.cpu().detach().clone() for name, param in model.state_dict().items()}
+            states = self._get_cpu_state_dict(model, kwargs.get("save_dtype"))
             torch.save(states, filepath)
         else:
             if self.model_device is not None:
@@ -182,6 +194,61 @@ class TorchDriver(Driver):
             else:
                 torch.save(model, filepath)
 
+    def _get_cpu_state_dict(self, model, save_dtype: Optional["torch.dtype"] = None) -> Dict:
+        """
+        将 ``model`` 的 state_dict 拷贝到 cpu 上。会根据 state_dict 的结构（各个张量的名字、形状、类型以及是否在 gpu 上）生成 save plan
+        并分配对应的 cpu 张量，gpu 上的张量通过专门的 stream 进行拷贝。默认情况下每次保存都会重新分配一份普通（非 pinned）的 cpu 张量，
+        保存结束后即被释放，driver 不会保留任何缓冲区。只有在 ``torch_kwargs`` 中设置了 ``reuse_save_buffers=True`` 时，gpu 上的张量才会
+        对应 pinned memory 从而可以使用异步的拷贝，并且 save plan 与这些张量会被保留下来，之后结构不变的保存会直接复用它们，只进行数据的
+        拷贝；此时返回的张量会在下一次保存时被覆盖，调用方需要在下一次保存之前完成序列化。
+
+        :param model: 需要保存的模型；
+        :param save_dtype: 若不为 ``None`` ，浮点类型的张量在拷贝时会被转换为该类型；
+        :return: 拷贝到 cpu 上的 state_dict ；
+        """
+        state_dict = model.state_dict()
+        plan = tuple((name, tensor.shape, save_dtype if save_dtype is not None and tensor.is_floating_point() else tensor.dtype,
+                      tensor.is_cuda) if isinstance(tensor, torch.Tensor)
+                     else (name, None, None, False) for name, tensor in state_dict.items())
+        if self._reuse_save_buffers and plan == self._save_plan:
+            buffers = self._save_buffers
+        else:
+            # pinned memory 的申请代价较高，只有在会被复用时才使用；
+            buffers = {name: torch.empty(shape, dtype=dtype, device='cpu', pin_memory=is_cuda and self._reuse_save_buffers)
+                       for name, shape, dtype, is_cuda in plan if shape is not None}
+            if self._reuse_save_buffers:
+                self._save_plan, self._save_buffers = plan, buffers
+        states = {}
+        copy_events = {}
+        for name, tensor in state_dict.items():
+            if isinstance(tensor, torch.Tensor):
+                if tensor.is_cuda:
+                    stream = self._get_save_copy_stream(tensor.device, copy_events)
+                    with torch.cuda.stream(stream):
+                        states[name] = buffers[name].copy_(tensor.detach(), non_blocking=True)
+                else:
+                    states[name] = buffers[name].copy_(tensor.detach())
+            else:
+                states[name] = tensor
+        # 只需要等待拷贝所在的 stream 完成，而不需要同步整个设备；
+        for device, event in copy_events.items():
+            self._save_copy_streams[device].record_event(event)
+            event.synchronize()
+        return states
+
+    def _get_save_copy_stream(self, device, copy_events: Dict):
+        """
+        返回 ``device`` 上专门用于保存时拷贝的 stream ；每次保存中第一次使用某个 stream 时，会先让其等待当前 stream 上已经提交的计算，
+        从而保证拷贝到的是最新的参数。
+        """
+        if device not in self._save_copy_streams:
+            self._save_copy_streams[device] = torch.cuda.Stream(device=device)
+        stream = self._save_copy_streams[device]
+        if device not in copy_events:
+            stream.wait_stream(torch.cuda.current_stream(device))
+            copy_events[device] = torch.cuda.Event()
+        return stream
+
     def load_model(self, filepath: Union[Path, str], only_state_dict: bool = True, **kwargs):
         """
         加载模型的函数；将 ``filepath`` 中的模型加载并赋值给当前 ``model`` 。
@@ -190,7 +257,9 @@ class TorchDriver(Driver):
         :param load_state_dict: 保存的内容是否只是权重
         """
         model = self.unwrap_model()
-        res = torch.load(filepath, map_location='cpu')
+        res = self._load_state_file(filepath) if only_state_dict else None
+        if res is None:
+            res = torch.load(filepath, map_location='cpu')
         if isinstance(res, dict) and only_state_dict is False:
             logger.rank_zero_warning(f"It seems like that {filepath} only contains state, you may need to use "
                                      f"`only_state_dict=True`")
@@ -202,6 +271,30 @@ class TorchDriver(Driver):
         _strict = kwargs.get("strict", True)
         model.load_state_dict(res, _strict)
 
+    @staticmethod
+    def _load_state_file(filepath):
+        """
+        以 ``mmap=True, weights_only=True`` 的方式读取只保存了权重的文件：张量直接从映射的文件中按需读取，不需要额外申请一份内存，同时跳过了通用的
+        pickle 反序列化过程。仅在 ``torch>=2.1`` 并且 ``filepath`` 为文件路径时生效，读取失败（例如文件中实际保存的是整个模型）时返回 ``None`` ，
+        由调用方回退到普通的 ``torch.load``；
+        """
+        if not _TORCH_GREATER_EQUAL_2_1 or not isinstance(filepath, (str, Path)):
+            return None
+        # 提示内核提前异步地将整个文件读入 page cache，避免之后按需读取张量时逐页触发缺页；
+        if hasattr(os, "posix_fadvise"):
+            try:
+                fd = os.open(filepath, os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+            except OSError:
+                pass
+        try:
+            return torch.load(filepath, map_location='cpu', mmap=True, weights_only=True)
+        except (pickle.UnpicklingError, RuntimeError):
+            return None
+
     @rank_zero_call
     def save_checkpoint(self, folder: Path, states: Dict, dataloader, only_state_dict: bool = True, should_save_model: bool = True, **kwargs):
         r"""
@@ -214,6 +307,9 @@ class TorchDriver(Driver):
         :param dataloader: 正在使用的 dataloader。
         :param only_state_dict: 是否只保存模型的参数，当 ``should_save_model`` 为 ``False`` ，该参数无效。
         :param should_save_model: 是否应该保存模型，如果为 ``False`` ，Driver 将不负责 model 的保存。
+        :kwargs:
+            * *optimizer_save_dtype* -- 若不为 ``None`` ，优化器中浮点类型的状态（ ``step`` 除外）会被转换为该类型（例如 ``torch.bfloat16``）
+              后再保存，从而减少保存的数据量；加载时 ``optimizer.load_state_dict`` 会自动转换回对应参数的类型；
         """
         # 传入的 dataloader 参数是 trainer 的 dataloader 属性，因为 driver 的所有 dataloader 我们是不会去改变它的，而是通过改变
         #  trainer.dataloader 来改变 dataloader 的状态，从而适配训练或者评测环境；
@@ -230,7 +326,12 @@ class TorchDriver(Driver):
             self.save_model(model_path, only_state_dict=only_state_dict)
 
         # 3. 保存 optimizers 的状态；
-        states["optimizers_state_dict"] = self.get_optimizer_state()
+        optimizers_state_dict = self.get_optimizer_state()
+        optimizer_save_dtype = kwargs.get("optimizer_save_dtype")
+        if optimizer_save_dtype is not None:
+            for optimizer_state in optimizers_state_dict.values():
+                optimizer_state["state"] = _optimizer_state_to_dtype(optimizer_state["state"], optimizer_save_dtype)
+        states["optimizers_state_dict"] = optimizers_state_dict
         logger.debug("Save optimizer state dict.")
 
         # 4. 保存fp16的状态
@@ -301,7 +301,28 @@ def optimizer_state_to_device(state, device):
         if isinstance(param, dict):
             new_state[name] = optimizer_state_to_device(param, device)
         elif isinstance(param, torch.Tensor):
-            new_state[name] = param.to(device).clone()
+            # copy=True 保证总是得到一份新的张量，同时避免跨设备迁移时 to 与 clone 各复制一次；
+            new_state[name] = param.to(device, copy=True)
+        else:
+            new_state[name] = param
+    return new_state
+
+
+def _optimizer_state_to_dtype(state, dtype):
+    r"""
+    将 ``optimizer`` 的 ``state_dict`` 中浮点类型的状态转换为 ``dtype`` ；``step`` 不会被转换，避免低精度类型下丢失计数。加载时
+    ``optimizer.load_state_dict`` 会自动将这些状态转换回对应参数的类型。
+
+    :param state: ``optimzier.state_dict()["state"]``。
+    :param dtype: 要转换到的浮点类型，例如 ``torch.bfloat16``。
+    :return: 转换后的新的 state_dict。
+    """
+    new_state = {}
+    for name, param in state.items():
+        if isinstance(param, dict):
+            new_state[name] = _optimizer_state_to_dtype(param, dtype)
+        elif isinstance(param, torch.Tensor) and param.is_floating_point() and name != "step":
+            new_state[name] = param.to(dtype)
         else:
             new_state[name] = param
     return new_state
@@ -1,3 +1,5 @@
+from typing import List
+
 from ..utils import AggregateMethodError
 
 __all__ = []
@@ -22,6 +24,16 @@ class Backend:
 
         return tensor
 
+    def aggregate_many(self, tensors: List, method: str) -> List:
+        """
+        使用相同的 ``method`` 聚合多个张量，返回聚合后的张量组成的列表。默认依次对每个张量调用 :meth:`aggregate` ，子类可以重写该
+        方法以将多个张量合并为一次通信。
+
+        :param tensors: 需要聚合的张量组成的列表
+        :param method: 聚合的方法
+        """
+        return [self.aggregate(tensor, method) for tensor in tensors]
+
     def create_tensor(self, value: float):
         """
         创建 tensor，并且填入 ``value`` 作为值。
@@ -36,23 +36,43 @@ class TorchBackend(Backend):
             if dist.is_initialized():
                 if method is None:
                     raise AggregateMethodError(should_have_aggregate_method=True)
-                tensor = self.all_gather_object(tensor)
-                if isinstance(tensor[0], torch.Tensor):
-                    tensor = torch.stack(tensor)
-                # 第一步, aggregate结果
-                if method == 'sum':
-                    tensor = torch.sum(tensor, dim=0)
-                elif method == 'mean':
-                    tensor = torch.mean(tensor, dim=0)
-                elif method == 'max':
-                    tensor, _ = torch.max(tensor, dim=0)
-                elif method == 'min':
-                    tensor, _ = torch.min(tensor, dim=0)
-                else:
-                    raise AggregateMethodError(should_have_aggregate_method=False)
+                tensor = self._gather_and_reduce(tensor, method)
 
         return tensor
 
+    def aggregate_many(self, tensors: List, method: str) -> List:
+        """
+        使用相同的 ``method`` 聚合多个张量。当这些张量的 ``dtype`` 与 ``device`` 一致时，会先将它们拼接为一个张量，这样只需要进行
+        一次通信，之后再拆分回原来的形状。
+
+        :param tensors: 需要聚合的张量组成的列表
+        :param method: 聚合的方法， 与 :meth:`aggregate` 一致
+        """
+        if len(tensors) < 2 or method is None or not dist.is_initialized() or \
+                not all(isinstance(tensor, torch.Tensor) for tensor in tensors) or \
+                len({(tensor.dtype, tensor.device) for tensor in tensors}) != 1:
+            return super().aggregate_many(tensors, method)
+        flat = self._gather_and_reduce(torch.cat([tensor.reshape(-1) for tensor in tensors]), method)
+        return [chunk.reshape(tensor.shape) for chunk, tensor in
+                zip(torch.split(flat, [tensor.numel() for tensor in tensors]), tensors)]
+
+    def _gather_and_reduce(self, tensor, method: str):
+        tensor = self.all_gather_object(tensor)
+        if isinstance(tensor[0], torch.Tensor):
+            tensor = torch.stack(tensor)
+        # 第一步, aggregate结果
+        if method == 'sum':
+            tensor = torch.sum(tensor, dim=0)
+        elif method == 'mean':
+            tensor = torch.mean(tensor, dim=0)
+        elif method == 'max':
+            tensor, _ = torch.max(tensor, dim=0)
+        elif method == 'min':
+            tensor, _ = torch.min(tensor, dim=0)
+        else:
+            raise AggregateMethodError(should_have_aggregate_method=False)
+        return tensor
+
     def create_tensor(self, value: float):
         """
         创建 tensor，并且填入 value 作为值
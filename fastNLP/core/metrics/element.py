@@ -22,6 +22,29 @@ def _wrap_cal_value(func):
     return _wrap_cal
 
 
+def _aggregate_elements(elements):
+    """
+    一起聚合 ``backend`` 与 ``aggregate_method`` 均相同的多个 :class:`Element` ，对于支持的 backend 只需要进行一次通信。
+
+    :param elements: 需要聚合的 :class:`Element` 组成的列表
+    """
+    if len(elements) > 1 and elements[0].aggregate_method is not None:
+        for element in elements:
+            element._check_value_initialized()
+        try:
+            values = elements[0].backend.aggregate_many([element._value for element in elements],
+                                                        elements[0].aggregate_method)
+        except AggregateMethodError:
+            # 交由每个 element 自己的 aggregate() 给出具体的报错信息
+            pass
+        else:
+            for element, value in zip(elements, values):
+                element._value = value
+            return
+    for element in elements:
+        element.aggregate()
+
+
 class Element:
     """
     保存 :class:`~fastNLP.core.metrics.Metric` 中计算的元素值的对象
@@ -49,7 +72,8 @@ class Element:
         self.aggregate_method = aggregate_method
         if backend == 'auto':
             raise RuntimeError(f"You have to specify the backend for Element:{self.name}.")
-        elif isinstance(backend, AutoBackend):
+        elif isinstance(backend, AutoBackend) or (isinstance(backend, Backend) and backend.is_specified()):
+            # AutoBackend 在确定框架后会被原地转换为具体的 Backend 类，此时直接共享该对象，不再重新包裹
             self.backend = backend
         else:
             self.backend = AutoBackend(backend)
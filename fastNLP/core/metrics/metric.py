@@ -4,13 +4,113 @@ __all__ = [
 
 from abc import abstractmethod
 
-from typing import Union, List
+from typing import Union, List, Dict
 import functools
 from contextlib import contextmanager
 import numpy as np
 
 from fastNLP.core.metrics.backend import Backend, AutoBackend
-from fastNLP.core.metrics.element import Element
+from fastNLP.core.metrics.element import Element, _aggregate_elements
+
+
+# 以字符串为 key 缓存已经确定了具体框架的 backend 。backend 均是无状态的，因此可以在多个 Metric 与 Element 之间共享；
+# 'auto' 对应的 AutoBackend 会在 check_backend() 时被原地转换，因此不能被缓存。
+_AUTO_BACKEND_CACHE: Dict[str, AutoBackend] = {}
+
+
+def _get_auto_backend(backend: Union[str, Backend, None]) -> AutoBackend:
+    if not isinstance(backend, str) or backend == 'auto':
+        return AutoBackend(backend)
+    if backend not in _AUTO_BACKEND_CACHE:
+        _AUTO_BACKEND_CACHE[backend] = AutoBackend(backend)
+    return _AUTO_BACKEND_CACHE[backend]
+
+
+def _wrap_auto_reset_elements(reset):
+    @functools.wraps(reset)
+    def _wrap_reset(self, *args, **kwargs):
+        self._updated = False
+        for ele in self._element_tuple:
+            ele.reset()
+        reset(self, *args, **kwargs)
+
+    return _wrap_reset
+
+
+def _sync_get_metric(get_metric):
+    @functools.wraps(get_metric)
+    def _wrap_get_metric(self, *args, **kwargs):
+        # 子类的 get_metric 中调用 super().get_metric() 时不再重复进行同步
+        if self._in_get_metric:
+            return get_metric(self, *args, **kwargs)
+        assert self._updated, f"You have to call `{self.__class__.__name__}'s update() function before calling " \
+                              f"get_metric()."
+        # 不需要聚合时 sync 不会做任何事情，直接调用以省去进入上下文管理器的开销
+        if not self.aggregate_when_get_metric:
+            return get_metric(self, *args, **kwargs)
+        self._in_get_metric = True
+        try:
+            with self.sync(recover=True, aggregate=True):
+                results = get_metric(self, *args, **kwargs)
+        finally:
+            self._in_get_metric = False
+        return results
+
+    return _wrap_get_metric
+
+
+def _wrap_update(update):
+    @functools.wraps(update)
+    def _wrap_update(self, *args, **kwargs):
+        # backend 确定之后便不再需要检查，避免每次 update 都进行一次额外的函数调用
+        if not self.backend.is_specified():
+            self.check_backend(*args, **kwargs)
+        self._cannot_change_element = True
+        self._updated = True
+        return update(self, *args, **kwargs)
+
+    return _wrap_update
+
+
+class _BoundMetricMethod:
+    """
+    通过实例访问 :class:`_MetricMethod` 时返回的对象。``__wrapped__`` 为绑定到实例上的原始方法，因此
+    ``signature_fn=metric.update.__wrapped__`` 这样的用法与在每个实例上单独包裹时保持一致；
+    """
+    __slots__ = ('_wrapper', '_instance', '__wrapped__')
+
+    def __init__(self, wrapper, instance, bound_func):
+        self._wrapper = wrapper
+        self._instance = instance
+        self.__wrapped__ = bound_func
+
+    def __call__(self, *args, **kwargs):
+        return self._wrapper(self._instance, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.__wrapped__, name)
+
+
+class _MetricMethod:
+    """
+    在定义 :class:`Metric` 子类时包裹 ``get_metric`` 、``update`` 和 ``reset`` 的描述符，所有实例共享同一个包裹后的函数；
+
+    :param wrapper: 包裹后的函数，第一个参数为 Metric 实例；
+    :param func: 被包裹的原始函数；
+    """
+    _fastnlp_wrapped = True
+
+    def __init__(self, wrapper, func):
+        self._wrapper = wrapper
+        functools.update_wrapper(self, func)
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return _BoundMetricMethod(self._wrapper, instance, self.__wrapped__.__get__(instance, owner))
+
+    def __call__(self, instance, *args, **kwargs):
+        return self._wrapper(instance, *args, **kwargs)
 
 
 class Metric:
@@ -23,15 +123,37 @@ class Metric:
         当 backend 不支持分布式时，该参数无意义。如果为 ``None`` ，将在 :class:`~fastNLP.core.controllers.Evaluator` 中根据
         sampler 是否使用分布式进行自动设置。
     """
+    # Metric 自身的属性保存在 slots 中，不占用实例的 __dict__ 。注册的 element 、确定 backend 后绑定的方法以及子类自己的属性都需要
+    # 动态地设置到实例上，因此这里同时声明了 __dict__ ，保证即使子类声明了 __slots__ 也仍然拥有 __dict__ 。_elements 需要排在最前面，
+    # 这样在 copy/pickle 恢复属性时 __setattr__ 可以正常访问 elements
+    __slots__ = ('_elements', '_element_tuple', '_keep_buf', 'backend', '_updated', '_in_get_metric', 'aggregate_when_get_metric',
+                 '_cannot_change_element', '__dict__')
+
     def __init__(self, backend: Union[str, Backend, None] = 'auto', aggregate_when_get_metric: bool = None):
-        self.backend = AutoBackend(backend)
+        # 最先设置 __setattr__ 中需要读取的两个属性
+        self._elements = {}
+        self._cannot_change_element = False
+        self.backend = _get_auto_backend(backend)
+        if self.backend.is_specified():
+            self._bind_backend_methods()
         self._updated = False
-        self.get_metric = self._sync_get_metric(self.get_metric)
-        self.update = self._wrap_update(self.update)
-        self.reset = self._wrap_auto_reset_elements(self.reset)
+        self._in_get_metric = False
         self.aggregate_when_get_metric = aggregate_when_get_metric
-        self._cannot_change_element = False
-        self._elements = {}
+        # 与 _elements 中的 element 顺序一致的 tuple ，仅在 register_element() 时重建，用于在 reset/to/sync 中快速遍历
+        self._element_tuple = ()
+        # sync() 时用于保存 element 聚合前的值，仅在 register_element() 时重新分配；使用 list 而不是 numpy 数组，保证整数等类型的
+        # 值在恢复时不会因为转换为 float64 而损失精度
+        self._keep_buf = []
+
+    def __init_subclass__(cls, **kwargs):
+        # 在定义子类时对 get_metric 、update 和 reset 进行一次包裹，所有实例共享包裹后的方法；已经被包裹过的方法（例如从父类
+        # 继承而来的）不会被重复包裹。
+        super().__init_subclass__(**kwargs)
+        for name, wrapper in (('get_metric', _sync_get_metric), ('update', _wrap_update),
+                              ('reset', _wrap_auto_reset_elements)):
+            func = getattr(cls, name)
+            if not getattr(func, '_fastnlp_wrapped', False):
+                setattr(cls, name, _MetricMethod(wrapper(func), func))
 
     @property
     def elements(self) -> dict:
@@ -60,12 +182,14 @@ class Metric:
         if backend == 'auto':
             backend = self.backend
         else:
-            backend = AutoBackend(backend)
+            backend = _get_auto_backend(backend)
 
         assert name is not None and name not in self.elements
 
         element = Element(name=name, value=value, aggregate_method=aggregate_method, backend=backend)
         self.elements[name] = element
+        self._element_tuple = (*self._element_tuple, element)
+        self._keep_buf = [None] * len(self._element_tuple)
         setattr(self, name, element)
         return element
 
@@ -76,68 +200,41 @@ class Metric:
         """
         pass
 
-    def _wrap_auto_reset_elements(self, reset):
-        @functools.wraps(reset)
-        def _wrap_reset(*args, **kwargs):
-            self._updated = False
-            for ele in self.elements.values():
-                ele.reset()
-            reset(*args, **kwargs)
-
-        return _wrap_reset
-
-    def _sync_get_metric(self, get_metric):
-        @functools.wraps(get_metric)
-        def _wrap_get_metric(*args, **kwargs):
-            assert self._updated, f"You have to call `{self.__class__.__name__}'s update() function before calling " \
-                                  f"get_metric()."
-            with self.sync(recover=True, aggregate=self.aggregate_when_get_metric):
-                results = get_metric(*args, **kwargs)
-            return results
-
-        return _wrap_get_metric
-
     def __setattr__(self, key, value):
-        if getattr(self, '_cannot_change_element', False):
-            if key in self.elements and isinstance(value, (float, int, bool)):
-                self.elements[key].fill_value(value)
+        # 直接读取 slot ，避免 getattr(self, ..., default) 在属性尚未设置时经过 __getattr__ 的开销
+        try:
+            cannot_change_element, elements = self._cannot_change_element, self._elements
+        except AttributeError:
+            # __init__ 尚未执行完毕
+            cannot_change_element, elements = False, {}
+        if cannot_change_element and key in elements:
+            if isinstance(value, (float, int, bool)):
+                elements[key].fill_value(value)
                 return
-            elif key in self.elements:
-                raise TypeError(f"self.{key} is an Element, only float/int/bool type value can be assigned to it, "
-                                f"instead of {type(value)}.")
-        if isinstance(value, Element) and key not in self.elements:
+            raise TypeError(f"self.{key} is an Element, only float/int/bool type value can be assigned to it, "
+                            f"instead of {type(value)}.")
+        if isinstance(value, Element) and key not in elements:
             raise RuntimeError("Please use register_element() function to add Element.")
         object.__setattr__(self, key, value)
 
-    # 当调用 __getattribute__ 没有找到时才会触发这个, 保留这个的目的只是为了防止 ide 的 warning
+    # 当调用 __getattribute__ 没有找到时才会触发这个, 保留这个的目的只是为了防止 ide 的 warning。注册的 element 在
+    # register_element() 时已经直接设置为实例的属性，因此这里无需再查找 elements 。
     def __getattr__(self, name: str) -> Element:
-        if 'elements' in self.__dict__:
-            elements = self.__dict__['elements']
-            if name in elements:
-                return elements[name]
         raise AttributeError("`{}` object has no attribute `{}`.".format(type(self).__name__, name))
 
-    def _wrap_update(self, update):
-        @functools.wraps(update)
-        def _wrap_update(*args, **kwargs):
-            self.check_backend(*args, **kwargs)
-            self._cannot_change_element = True
-            self._updated = True
-            return update(*args, **kwargs)
-
-        return _wrap_update
-
     def check_backend(self, *args, **kwargs):
         """
         根据传入的参数的类型选择当前需要的 backend
         """
-        if not self.backend.is_specified():
-            _args = []
-            for arg in args:
-                _args.append(arg)
-            for arg in kwargs.values():
-                _args.append(arg)
-            self.backend.choose_real_backend(_args)
+        if self.backend.is_specified():
+            return
+        self.backend.choose_real_backend([*args, *kwargs.values()])
+        self._bind_backend_methods()
+
+    def _bind_backend_methods(self):
+        # backend 确定之后直接将其方法绑定到实例上，省去每次调用 tensor2numpy 时经过 Metric 的一层转发。由于 AutoBackend
+        # 会在 choose_real_backend() 时原地替换 __class__ ，因此只能在 backend 确定之后进行绑定。
+        self.tensor2numpy = self.backend.tensor2numpy
 
     @contextmanager
     def sync(self, recover=True, aggregate=False):
@@ -145,21 +242,24 @@ class Metric:
         在这个上下文下， :meth:`Metric` 会自动先同步需要同步操作的 element 。当 ``recover`` 为 ``True`` 时，在退出环境的时候，会重新将 element 的
         值恢复到计算前的值。
         """
-        keep_value = {}
+        aggregate = aggregate and len(self._element_tuple) > 0
         if aggregate:
-            for name, element in self.elements.items():
-                # 保存过去的值
-                keep_value[name] = element.get_scalar()
-                # 聚合结果
-                element.aggregate()
+            # 保存过去的值，顺序与 _element_tuple 一致
+            keep_value = self._keep_buf
+            groups = {}
+            for i, element in enumerate(self._element_tuple):
+                keep_value[i] = element.get_scalar()
+                groups.setdefault((element.backend.__class__, element.aggregate_method), []).append(element)
+            # 聚合结果，backend 与 aggregate_method 相同的 element 一起进行聚合
+            for elements in groups.values():
+                _aggregate_elements(elements)
 
         yield
 
         if recover and aggregate:
-            for name, element in self.elements.items():
-                # 恢复结果
-                if name in keep_value:
-                    element.fill_value(value=keep_value.get(name))
+            # 恢复结果
+            for element, value in zip(self._element_tuple, keep_value):
+                element.fill_value(value=value)
 
     @abstractmethod
     def update(self, *args, **kwargs):
@@ -192,7 +292,7 @@ class Metric:
         :param device:
         :return:
         """
-        for element in self.elements.values():
+        for element in self._element_tuple:
             element.to(device)
 
     def all_gather_object(self, obj, group=None)->List:
@@ -10,20 +10,22 @@ from fastNLP.envs.set_backend import SUPPORT_BACKENDS
 
 backend = os.environ.get(FASTNLP_BACKEND, 'all')
 if backend == 'all':
-    need_import = SUPPORT_BACKENDS
+    need_import = frozenset(SUPPORT_BACKENDS)
 elif ',' in backend:
-    need_import = list(map(str.strip, backend.split(',')))
+    need_import = frozenset(map(str.strip, backend.split(',')))
 else:
-    need_import = [backend]
+    need_import = frozenset([backend])
 
 
 _IS_WINDOWS = platform.system() == "Windows"
-_NEED_IMPORT_FAIRSCALE = not _IS_WINDOWS and _module_available("fairscale") and 'torch' in need_import
-_NEED_IMPORT_TORCH = _module_available("torch") and 'torch' in need_import
-_NEED_IMPORT_JITTOR = _module_available("jittor") and 'jittor' in need_import
-_NEED_IMPORT_PADDLE = _module_available("paddle") and 'paddle' in need_import
-_NEED_IMPORT_DEEPSPEED = _module_available("deepspeed") and 'torch' in need_import
-_NEED_IMPORT_ONEFLOW = _module_available("oneflow") and 'oneflow' in need_import
+# 先判断是否需要该 backend 再探测模块是否存在，避免对用户未使用的 backend 进行探测
+_NEED_IMPORT_TORCH = 'torch' in need_import and _module_available("torch")
+_NEED_IMPORT_FAIRSCALE = _NEED_IMPORT_TORCH and not _IS_WINDOWS and _module_available("fairscale")
+_NEED_IMPORT_DEEPSPEED = _NEED_IMPORT_TORCH and _module_available("deepspeed")
+_NEED_IMPORT_JITTOR = 'jittor' in need_import and _module_available("jittor")
+_NEED_IMPORT_PADDLE = 'paddle' in need_import and _module_available("paddle")
+_NEED_IMPORT_ONEFLOW = 'oneflow' in need_import and _module_available("oneflow")
 
 _TORCH_GREATER_EQUAL_1_8 = _NEED_IMPORT_TORCH and _compare_version("torch", operator.ge, "1.8.0")
-_TORCH_GREATER_EQUAL_1_12 = _NEED_IMPORT_TORCH and _compare_version("torch", operator.ge, "1.12.0")
\ No newline at end of file
+_TORCH_GREATER_EQUAL_1_12 = _NEED_IMPORT_TORCH and _compare_version("torch", operator.ge, "1.12.0")
+_TORCH_GREATER_EQUAL_2_1 = _NEED_IMPORT_TORCH and _compare_version("torch", operator.ge, "2.1.0")
\ No newline at end of file
@@ -5,14 +5,17 @@ from dataclasses import dataclass
 from pathlib import Path
 import re
 import time
+import gc
+import shutil
+from typing import List
+from concurrent.futures import ThreadPoolExecutor, Future, wait
 
 from fastNLP.core.callbacks.checkpoint_callback import CheckpointCallback
 from fastNLP.core.controllers.trainer import Trainer
 from fastNLP import Evaluator
-from fastNLP.envs import FASTNLP_LAUNCH_TIME, FASTNLP_DISTRIBUTED_CHECK
+from fastNLP.envs import FASTNLP_LAUNCH_TIME, FASTNLP_DISTRIBUTED_CHECK, FASTNLP_MODEL_FILENAME, FASTNLP_GLOBAL_RANK
 
 from tests.helpers.utils import magic_argv_env_context
-from fastNLP.envs.distributed import rank_zero_rm
 from tests.helpers.models.torch_model import TorchNormalModel_Classification_1
 from tests.helpers.datasets.torch_data import TorchArgMaxDataset
 from tests.helpers.utils import Capturing
@@ -20,16 +23,76 @@ from fastNLP.core.log import logger
 
 from fastNLP.envs.imports import _NEED_IMPORT_TORCH
 if _NEED_IMPORT_TORCH:
+    import torch
     from torch.utils.data import DataLoader
     from torch.optim import SGD
     import torch.distributed as dist
     from torchmetrics import Accuracy
 
+# 用于匹配 topk 保存的文件夹名字；
+_MODEL_TOPK_RE = re.compile("model-epoch_[0-9]+-batch_[0-9]+-[a-zA-Z#]+_[0-9]*.?[0-9]*")
+_TRAINER_TOPK_RE = re.compile("trainer-epoch_[0-9]+-batch_[0-9]+-[a-zA-Z#]+_[0-9]*.?[0-9]*")
+
+
+def _list_saved(p):
+    """
+    返回 ``p`` 文件夹下所有保存的文件夹，key 为文件夹的名字，value 为对应的 :class:`Path`；
+    """
+    return {e.name: Path(e.path) for e in os.scandir(p)}
+
+
+def _find_topk(pattern, names):
+    """
+    返回 ``names`` 中所有能够被 ``pattern`` 匹配到的 topk 文件夹的名字；
+    """
+    return [m.group(0) for m in map(pattern.search, names) if m is not None]
+
+
+def _free_memory():
+    """
+    回收每次保存、加载循环中创建的 trainer 等对象，并释放 cuda 缓存，避免显存在多个参数组合之间不断累积；
+    """
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+# 在后台线程中删除每个测试保存的文件夹，使删除与下一个测试的训练同时进行；
+_cleanup_pool = ThreadPoolExecutor(max_workers=2)
+_pending: List[Future] = []
+
+
+def _rm_in_background(path: Path):
+    """
+    在后台删除 ``path``。由于所有测试共用同一个保存文件夹，这里先将 ``path`` 重命名为一个唯一的名字再交给后台线程删除，避免误删下一个测试
+    刚刚保存的文件；
+    """
+    if int(os.environ.get(FASTNLP_GLOBAL_RANK, 0)) != 0 or not path.exists():
+        return
+    trash = path.with_name(f"{path.name}-removing-{os.getpid()}-{time.time_ns()}")
+    path.rename(trash)
+    _pending.append(_cleanup_pool.submit(shutil.rmtree, trash, ignore_errors=True))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def wait_background_cleanup():
+    yield
+    wait(_pending)
+
+
+@pytest.fixture
+def destroy_process_group():
+    # 放在 fixture 的清理阶段中，保证测试失败时进程组也会被销毁，不会影响之后的测试；
+    yield
+    if dist.is_initialized():
+        dist.destroy_process_group()
+
+
 @dataclass
 class ArgMaxDatasetConfig:
     num_labels: int = 10
     feature_dimension: int = 10
-    data_num: int = 50
+    data_num: int = 20
     seed: int = 0
 
     batch_size: int = 2
@@ -75,136 +138,148 @@ def model_and_optimizers(request):
 
 
 @pytest.mark.torch
+@pytest.mark.usefixtures("destroy_process_group")
 @pytest.mark.parametrize("driver,device", [("torch", [4, 5])])  # ("torch", "cpu"), ("torch", [0, 1]), ("torch", 1)
+@pytest.mark.parametrize("version", [0, 1])
+@pytest.mark.parametrize("only_state_dict", [True, False])
 @magic_argv_env_context(timeout=100)
 def test_model_checkpoint_callback_1(
     model_and_optimizers: TrainerParameters,
     driver,
-    device
+    device,
+    version,
+    only_state_dict
 ):
-    for version in [0, 1]:
-        for only_state_dict in [True, False]:
-            try:
-                path = Path.cwd().joinpath(f"test_model_checkpoint")
-                path.mkdir(exist_ok=True, parents=True)
-
-                if version == 0:
-                    callbacks = [
-                        CheckpointCallback(folder=path, every_n_epochs=1, every_n_batches=123, last=False, on_exceptions=None, topk=0,
-                                           monitor=None, only_state_dict=only_state_dict, save_object='model')
-                    ]
-                elif version == 1:
-                    callbacks = [
-                        CheckpointCallback(folder=path, every_n_epochs=3, every_n_batches=None, last=True, on_exceptions=None, topk=2,
-                                           monitor="acc", only_state_dict=only_state_dict, save_object='model')
-                    ]
-
-                trainer = Trainer(
-                    model=model_and_optimizers.model,
-                    driver=driver,
-                    device=device,
-                    optimizers=model_and_optimizers.optimizers,
-                    train_dataloader=model_and_optimizers.train_dataloader,
-                    evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
-                    input_mapping=model_and_optimizers.input_mapping,
-                    output_mapping=model_and_optimizers.output_mapping,
-                    metrics=model_and_optimizers.metrics,
-                    n_epochs=10,
-                    callbacks=callbacks,
-                    output_from_new_proc="all"
-                )
-
-                trainer.run()
-                print("Finish train")
-                all_saved_model_paths = {w.name: w for w in path.joinpath(os.environ[FASTNLP_LAUNCH_TIME]).iterdir()}
-                # 检查生成保存模型文件的数量是不是正确的；
-                if version == 0:
-
-                    if not isinstance(device, list):
-                        assert "model-epoch_10" in all_saved_model_paths
-                        assert "model-epoch_4-batch_123" in all_saved_model_paths
-
-                        epoch_save_path = all_saved_model_paths["model-epoch_10"]
-                        step_save_path = all_saved_model_paths["model-epoch_4-batch_123"]
-
-                        assert len(all_saved_model_paths) == 12
-                    # ddp 下的文件名不同，因为同样的数据，ddp 用了更少的步数跑完；
-                    else:
-                        assert "model-epoch_6" in all_saved_model_paths
-                        assert "model-epoch_9-batch_123" in all_saved_model_paths
-
-                        epoch_save_path = all_saved_model_paths["model-epoch_6"]
-                        step_save_path = all_saved_model_paths["model-epoch_9-batch_123"]
-
-                        assert len(all_saved_model_paths) == 11
-                    all_state_dicts = [epoch_save_path, step_save_path]
-
-                elif version == 1:
-
-                    pattern = re.compile("model-epoch_[0-9]+-batch_[0-9]+-[a-zA-Z#]+_[0-9]*.?[0-9]*")
-
-                    if not isinstance(device, list):
-                        assert "model-epoch_9" in all_saved_model_paths
-                        assert "model-last" in all_saved_model_paths
-                        aLL_topk_folders = []
-                        for each_folder_name in all_saved_model_paths:
-                            each_folder_name = pattern.findall(each_folder_name)
-                            if len(each_folder_name) != 0:
-                                aLL_topk_folders.append(each_folder_name[0])
-                        assert len(aLL_topk_folders) == 2
-
-                        epoch_save_path = all_saved_model_paths["model-epoch_9"]
-                        last_save_path = all_saved_model_paths["model-last"]
-                        topk_save_path = all_saved_model_paths[aLL_topk_folders[0]]
-
-                        assert len(all_saved_model_paths) == 6
-                    # ddp 下的文件名不同，因为同样的数据，ddp 用了更少的步数跑完；
-                    else:
-                        assert "model-epoch_9" in all_saved_model_paths
-                        assert "model-last" in all_saved_model_paths
-
-                        aLL_topk_folders = []
-                        for each_folder_name in all_saved_model_paths:
-                            each_folder_name = pattern.findall(each_folder_name)
-                            if len(each_folder_name) != 0:
-                                aLL_topk_folders.append(each_folder_name[0])
-                        assert len(aLL_topk_folders) == 2
-
-                        epoch_save_path = all_saved_model_paths["model-epoch_9"]
-                        last_save_path = all_saved_model_paths["model-last"]
-                        topk_save_path = all_saved_model_paths[aLL_topk_folders[0]]
-
-                        assert len(all_saved_model_paths) == 6
-
-                    all_state_dicts = [epoch_save_path, last_save_path, topk_save_path]
-
-                for folder in all_state_dicts:
-                    trainer = Trainer(
-                        model=model_and_optimizers.model,
-                        driver=driver,
-                        device=device,
-                        optimizers=model_and_optimizers.optimizers,
-                        train_dataloader=model_and_optimizers.train_dataloader,
-                        evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
-                        input_mapping=model_and_optimizers.input_mapping,
-                        output_mapping=model_and_optimizers.output_mapping,
-                        metrics=model_and_optimizers.metrics,
-
-                        n_epochs=2,
-                        output_from_new_proc="all"
-                    )
-                    trainer.load_model(folder, only_state_dict=only_state_dict)
-
-                    trainer.run()
-                    trainer.driver.barrier()
-            finally:
-                rank_zero_rm(path)
+    try:
+        path = Path.cwd().joinpath(f"test_model_checkpoint")
+        path.mkdir(exist_ok=True, parents=True)
 
-    if dist.is_initialized():
-        dist.destroy_process_group()
+        if version == 0:
+            callbacks = [
+                CheckpointCallback(folder=path, every_n_epochs=1, every_n_batches=17, last=False, on_exceptions=None, topk=0,
+                                   monitor=None, only_state_dict=only_state_dict, save_object='model',
+                                   async_save=True, save_dtype=torch.bfloat16)
+            ]
+        elif version == 1:
+            callbacks = [
+                CheckpointCallback(folder=path, every_n_epochs=3, every_n_batches=None, last=True, on_exceptions=None, topk=2,
+                                   monitor="acc", only_state_dict=only_state_dict, save_object='model',
+                                   async_save=True, save_dtype=torch.bfloat16)
+            ]
+
+        trainer = Trainer(
+            model=model_and_optimizers.model,
+            driver=driver,
+            device=device,
+            optimizers=model_and_optimizers.optimizers,
+            train_dataloader=model_and_optimizers.train_dataloader,
+            evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
+            input_mapping=model_and_optimizers.input_mapping,
+            output_mapping=model_and_optimizers.output_mapping,
+            metrics=model_and_optimizers.metrics,
+            n_epochs=4,
+            callbacks=callbacks,
+            output_from_new_proc="all"
+        )
+
+        trainer.run()
+        print("Finish train")
+        save_root = path.joinpath(os.environ[FASTNLP_LAUNCH_TIME])
+        all_saved_model_paths = _list_saved(save_root)
+        # 检查生成保存模型文件的数量是不是正确的；
+        if version == 0:
+
+            if not isinstance(device, list):
+                assert "model-epoch_4" in all_saved_model_paths
+                assert "model-epoch_1-batch_17" in all_saved_model_paths
+
+                epoch_save_path = all_saved_model_paths["model-epoch_4"]
+                step_save_path = all_saved_model_paths["model-epoch_1-batch_17"]
+
+                assert len(all_saved_model_paths) == 6
+            # ddp 下的文件名不同，因为同样的数据，ddp 用了更少的步数跑完；
+            else:
+                assert "model-epoch_2" in all_saved_model_paths
+                assert "model-epoch_3-batch_17" in all_saved_model_paths
+
+                epoch_save_path = all_saved_model_paths["model-epoch_2"]
+                step_save_path = all_saved_model_paths["model-epoch_3-batch_17"]
+
+                assert len(all_saved_model_paths) == 5
+            all_state_dicts = [epoch_save_path, step_save_path]
+
+        elif version == 1:
+
+            pattern = _MODEL_TOPK_RE
+
+            if not isinstance(device, list):
+                assert "model-epoch_3" in all_saved_model_paths
+                assert "model-last" in all_saved_model_paths
+                aLL_topk_folders = list(callbacks[0].topk_paths)
+                # 与按照文件夹名字匹配得到的 topk 文件夹一致；
+                assert sorted(aLL_topk_folders) == sorted(_find_topk(pattern, all_saved_model_paths))
+                assert len(aLL_topk_folders) == 2
+
+                epoch_save_path = all_saved_model_paths["model-epoch_3"]
+                last_save_path = all_saved_model_paths["model-last"]
+                topk_save_path = all_saved_model_paths[aLL_topk_folders[0]]
+
+                assert len(all_saved_model_paths) == 4
+            # ddp 下的文件名不同，因为同样的数据，ddp 用了更少的步数跑完；
+            else:
+                assert "model-epoch_3" in all_saved_model_paths
+                assert "model-last" in all_saved_model_paths
+
+                aLL_topk_folders = list(callbacks[0].topk_paths)
+                # 与按照文件夹名字匹配得到的 topk 文件夹一致；
+                assert sorted(aLL_topk_folders) == sorted(_find_topk(pattern, all_saved_model_paths))
+                assert len(aLL_topk_folders) == 2
+
+                epoch_save_path = all_saved_model_paths["model-epoch_3"]
+                last_save_path = all_saved_model_paths["model-last"]
+                topk_save_path = all_saved_model_paths[aLL_topk_folders[0]]
+
+                assert len(all_saved_model_paths) == 4
+
+            all_state_dicts = [epoch_save_path, last_save_path, topk_save_path]
+
+        # 只用第一个保存的模型检验加载后继续训练，其余的模型只需要检验能够被正确加载并评测；
+        trainer = Trainer(
+            model=model_and_optimizers.model,
+            driver=driver,
+            device=device,
+            optimizers=model_and_optimizers.optimizers,
+            train_dataloader=model_and_optimizers.train_dataloader,
+            evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
+            input_mapping=model_and_optimizers.input_mapping,
+            output_mapping=model_and_optimizers.output_mapping,
+            metrics=model_and_optimizers.metrics,
+
+            n_epochs=2,
+            output_from_new_proc="all"
+        )
+        trainer.load_model(all_state_dicts[0], only_state_dict=only_state_dict)
+        trainer.run()
+        trainer.driver.barrier()
+
+        evaluator = Evaluator(model=model_and_optimizers.model, driver=trainer.driver,
+                              dataloaders=model_and_optimizers.evaluate_dataloaders,
+                              input_mapping=model_and_optimizers.input_mapping,
+                              output_mapping=model_and_optimizers.output_mapping,
+                              metrics=model_and_optimizers.metrics)
+        # evaluator.run 在汇总 metric 时已经同步了所有进程，因此只需要在全部加载完成后 barrier 一次；
+        for folder in all_state_dicts[1:]:
+            evaluator.load_model(folder, only_state_dict=only_state_dict)
+            evaluator.run()
+        trainer.driver.barrier()
+        del trainer, evaluator
+    finally:
+        _rm_in_background(path)
+        _free_memory()
 
 
 @pytest.mark.torch
+@pytest.mark.usefixtures("destroy_process_group")
 @pytest.mark.parametrize("driver,device", [("torch", "cpu"), ("torch", [0, 1])])  # ("torch", "cpu"), ("torch", [0, 1]), ("torch", 1)
 @pytest.mark.parametrize("only_state_dict", [True, False])  # ("torch", "cpu"), ("torch", [0, 1]), ("torch", 1)
 @magic_argv_env_context(timeout=100)
@@ -243,7 +318,7 @@ def test_model_checkpoint_callback_2(
                 output_mapping=model_and_optimizers.output_mapping,
                 metrics=model_and_optimizers.metrics,
 
-                n_epochs=10,
+                n_epochs=5,
                 callbacks=callbacks,
                 output_from_new_proc="all"
             )
@@ -256,181 +331,373 @@ def test_model_checkpoint_callback_2(
                 os.environ.pop(FASTNLP_DISTRIBUTED_CHECK)
 
         # 检查生成保存模型文件的数量是不是正确的；
-        all_saved_model_paths = {w.name: w for w in path.joinpath(os.environ[FASTNLP_LAUNCH_TIME]).iterdir()}
+        save_root = path.joinpath(os.environ[FASTNLP_LAUNCH_TIME])
+        all_saved_model_paths = _list_saved(save_root)
 
         if not isinstance(device, list):
-            assert "model-epoch_4-batch_100-exception_NotImplementedError" in all_saved_model_paths
-            exception_model_path = all_saved_model_paths["model-epoch_4-batch_100-exception_NotImplementedError"]
+            assert "model-epoch_4-batch_40-exception_NotImplementedError" in all_saved_model_paths
+            exception_model_path = all_saved_model_paths["model-epoch_4-batch_40-exception_NotImplementedError"]
         # ddp 下的文件名不同，因为同样的数据，ddp 用了更少的步数跑完；
         else:
-            assert "model-epoch_4-batch_52-exception_NotImplementedError" in all_saved_model_paths
-            exception_model_path = all_saved_model_paths["model-epoch_4-batch_52-exception_NotImplementedError"]
+            assert "model-epoch_4-batch_20-exception_NotImplementedError" in all_saved_model_paths
+            exception_model_path = all_saved_model_paths["model-epoch_4-batch_20-exception_NotImplementedError"]
 
         assert len(all_saved_model_paths) == 1
         all_state_dicts = [exception_model_path]
 
-        for folder in all_state_dicts:
-            trainer = Trainer(
-                model=model_and_optimizers.model,
-                driver="torch",
-                device=0,
-                optimizers=model_and_optimizers.optimizers,
-                train_dataloader=model_and_optimizers.train_dataloader,
-                evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
-                input_mapping=model_and_optimizers.input_mapping,
-                output_mapping=model_and_optimizers.output_mapping,
-                metrics=model_and_optimizers.metrics,
-
-                n_epochs=2,
-                output_from_new_proc="all"
-            )
+        # trainer 与 evaluator 只需要创建一次，evaluator 直接复用 trainer 的 driver；
+        trainer = Trainer(
+            model=model_and_optimizers.model,
+            driver="torch",
+            device=0,
+            optimizers=model_and_optimizers.optimizers,
+            train_dataloader=model_and_optimizers.train_dataloader,
+            evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
+            input_mapping=model_and_optimizers.input_mapping,
+            output_mapping=model_and_optimizers.output_mapping,
+            metrics=model_and_optimizers.metrics,
 
+            n_epochs=2,
+            output_from_new_proc="all"
+        )
+        evaluator = Evaluator(model=model_and_optimizers.model, driver=trainer.driver,
+                              dataloaders=model_and_optimizers.evaluate_dataloaders,
+                              input_mapping=model_and_optimizers.input_mapping,
+                              output_mapping=model_and_optimizers.output_mapping,
+                              metrics=model_and_optimizers.metrics)
+        for folder in all_state_dicts:
             trainer.load_model(folder, only_state_dict=only_state_dict)
             trainer.run()
-            evaluator = Evaluator(model=model_and_optimizers.model, driver='torch', device=0,
-                                  dataloaders=model_and_optimizers.evaluate_dataloaders,
-                                  input_mapping=model_and_optimizers.input_mapping,
-                                  output_mapping=model_and_optimizers.output_mapping,
-                                  metrics=model_and_optimizers.metrics)
             evaluator.load_model(folder, only_state_dict=only_state_dict)
             evaluator.run()
-            trainer.driver.barrier()
+        trainer.driver.barrier()
+        del trainer, evaluator
 
     finally:
-        rank_zero_rm(path)
+        _rm_in_background(path)
+        _free_memory()
         # pass
 
-    if dist.is_initialized():
-        dist.destroy_process_group()
+
+@pytest.mark.torch
+@pytest.mark.parametrize("only_state_dict", [True, False])
+@pytest.mark.parametrize("async_save", [True, False])
+def test_model_checkpoint_callback_3(
+    model_and_optimizers: TrainerParameters,
+    only_state_dict,
+    async_save
+):
+    try:
+        path = Path.cwd().joinpath(f"test_model_checkpoint")
+        path.mkdir(exist_ok=True, parents=True)
+
+        callbacks = [
+            CheckpointCallback(folder=path, every_n_epochs=1, every_n_batches=None, last=True, on_exceptions=None, topk=1,
+                               monitor="acc", only_state_dict=only_state_dict, save_object='model', async_save=async_save)
+        ]
+
+        trainer = Trainer(
+            model=model_and_optimizers.model,
+            driver="torch",
+            device="cpu",
+            optimizers=model_and_optimizers.optimizers,
+            train_dataloader=model_and_optimizers.train_dataloader,
+            evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
+            input_mapping=model_and_optimizers.input_mapping,
+            output_mapping=model_and_optimizers.output_mapping,
+            metrics=model_and_optimizers.metrics,
+            n_epochs=3,
+            callbacks=callbacks,
+        )
+        trainer.run()
+
+        # trainer.run() 返回时后台线程应当已经完成了所有的写入与删除；
+        save_root = path.joinpath(os.environ[FASTNLP_LAUNCH_TIME])
+        all_saved_model_paths = _list_saved(save_root)
+        for name in ["model-epoch_1", "model-epoch_2", "model-epoch_3", "model-last"]:
+            assert name in all_saved_model_paths
+        topk_paths = list(callbacks[0].topk_paths)
+        assert sorted(topk_paths) == sorted(_find_topk(_MODEL_TOPK_RE, all_saved_model_paths))
+        assert len(topk_paths) == 1
+        assert len(all_saved_model_paths) == 5
+
+        # 只保存 state_dict 时，同一个 batch 下的保存只会写一次，其余的文件夹中是对应模型文件的硬链接；
+        topk_epoch = re.match("model-epoch_([0-9]+)-", topk_paths[0]).group(1)
+        assert os.path.samefile(all_saved_model_paths[topk_paths[0]].joinpath(FASTNLP_MODEL_FILENAME),
+                                all_saved_model_paths[f"model-epoch_{topk_epoch}"].joinpath(FASTNLP_MODEL_FILENAME)) \
+               == only_state_dict
+        assert os.path.samefile(all_saved_model_paths["model-last"].joinpath(FASTNLP_MODEL_FILENAME),
+                                all_saved_model_paths["model-epoch_3"].joinpath(FASTNLP_MODEL_FILENAME)) == only_state_dict
+
+        for folder in all_saved_model_paths.values():
+            trainer.load_model(folder, only_state_dict=only_state_dict)
+
+        # 重新加载模型之后，即使 global_forward_batches 相同也需要重新写入模型文件；
+        topk_saver = callbacks[0].topk_saver
+        topk_saver.save(trainer, folder_name="model-reload")
+        topk_saver.wait_async_save()
+        assert not os.path.samefile(save_root.joinpath("model-reload", FASTNLP_MODEL_FILENAME),
+                                    all_saved_model_paths["model-last"].joinpath(FASTNLP_MODEL_FILENAME))
+    finally:
+        _rm_in_background(path)
+
+
+@pytest.mark.torch
+def test_model_checkpoint_callback_topk_all(model_and_optimizers: TrainerParameters, tmp_path):
+    # topk=-1 时所有的 evaluate 结果都会被保存，topk_paths 中也应当包含所有保存的文件夹；
+    callbacks = [CheckpointCallback(folder=tmp_path, topk=-1, monitor="acc", save_object='model')]
+    trainer = Trainer(
+        model=model_and_optimizers.model,
+        driver="torch",
+        device="cpu",
+        optimizers=model_and_optimizers.optimizers,
+        train_dataloader=model_and_optimizers.train_dataloader,
+        evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
+        input_mapping=model_and_optimizers.input_mapping,
+        output_mapping=model_and_optimizers.output_mapping,
+        metrics=model_and_optimizers.metrics,
+        n_epochs=3,
+        callbacks=callbacks,
+    )
+    trainer.run()
+
+    all_saved_model_paths = _list_saved(tmp_path.joinpath(os.environ[FASTNLP_LAUNCH_TIME]))
+    topk_paths = callbacks[0].topk_paths
+    assert len(topk_paths) == 3
+    assert sorted(topk_paths) == sorted(_find_topk(_MODEL_TOPK_RE, all_saved_model_paths))
+    for name, folder in topk_paths.items():
+        assert folder == all_saved_model_paths[name]
+
+
+def test_async_save_raise_early(tmp_path):
+    from fastNLP.core.callbacks.topk_saver import _AsyncSaveWorker
+
+    # 父路径是文件，写入一定会失败；失败的异常应当在下一次提交时就被抛出，而不是等到训练结束
+    blocker = tmp_path.joinpath('blocker')
+    blocker.write_bytes(b'')
+    saver = _AsyncSaveWorker()
+    saver.submit('write', str(blocker.joinpath('model.pkl.tar')), b'0')
+    wait(saver._futures)
+    with pytest.raises(OSError):
+        saver.submit('write', str(tmp_path.joinpath('a', 'model.pkl.tar')), b'0')
+    # 异常只会被抛出一次，之后的提交与等待正常进行
+    saver.submit('write', str(tmp_path.joinpath('a', 'model.pkl.tar')), b'0')
+    saver.join()
+    assert tmp_path.joinpath('a', 'model.pkl.tar').read_bytes() == b'0'
+
+
+def test_async_save_fallback_unsupported_driver(tmp_path):
+    from fastNLP.core.callbacks.topk_saver import Saver
+
+    class _UnsupportedDriver:
+        def barrier(self):
+            pass
+
+    class _Trainer:
+        driver = _UnsupportedDriver()
+        global_forward_batches = 0
+
+        def __init__(self):
+            self.saved = []
+
+        def save_model(self, folder, **kwargs):
+            self.saved.append(folder)
+
+    # 不能保存到内存中的 driver 会退化为同步保存，直接保存到对应的文件夹中
+    saver = Saver(folder=tmp_path, save_object='model', async_save=True)
+    trainer = _Trainer()
+    folder = saver.save(trainer, folder_name='model-epoch_1')
+    assert saver.async_saver is None
+    assert trainer.saved == [Path(folder)]
 
 
 @pytest.mark.torch
+def test_async_save_keep_train_exception(model_and_optimizers, tmp_path, monkeypatch):
+    from fastNLP import Callback
+    from fastNLP.core.callbacks import topk_saver
+
+    def _failed_write(path, payload):
+        raise OSError("disk is full")
+    monkeypatch.setattr(topk_saver, '_async_write', _failed_write)
+
+    class RaiseCallback(Callback):
+        def on_train_epoch_end(self, trainer):
+            raise ValueError("train failed")
+
+    # 写盘失败的异常不能覆盖训练本身的异常
+    callbacks = [
+        CheckpointCallback(folder=tmp_path, every_n_epochs=1, save_object='model', async_save=True),
+        RaiseCallback()
+    ]
+    trainer = Trainer(
+        model=model_and_optimizers.model,
+        driver="torch",
+        device="cpu",
+        optimizers=model_and_optimizers.optimizers,
+        train_dataloader=model_and_optimizers.train_dataloader,
+        evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
+        input_mapping=model_and_optimizers.input_mapping,
+        output_mapping=model_and_optimizers.output_mapping,
+        metrics=model_and_optimizers.metrics,
+        n_epochs=2,
+        callbacks=callbacks,
+    )
+    with pytest.raises(ValueError, match="train failed"):
+        trainer.run()
+
+    # 训练正常结束时写盘的异常会在训练结束时抛出
+    trainer = Trainer(
+        model=model_and_optimizers.model,
+        driver="torch",
+        device="cpu",
+        optimizers=model_and_optimizers.optimizers,
+        train_dataloader=model_and_optimizers.train_dataloader,
+        evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
+        input_mapping=model_and_optimizers.input_mapping,
+        output_mapping=model_and_optimizers.output_mapping,
+        metrics=model_and_optimizers.metrics,
+        n_epochs=1,
+        callbacks=[callbacks[0]],
+    )
+    with pytest.raises(OSError, match="disk is full"):
+        trainer.run()
+
+
+@pytest.mark.torch
+@pytest.mark.usefixtures("destroy_process_group")
 @pytest.mark.parametrize("driver,device", [("torch", "cpu"), ("torch", [0, 1])])  # ("torch", "cpu"), ("torch", [0, 1]), ("torch", 1)
+@pytest.mark.parametrize("version", [0, 1])
+@pytest.mark.parametrize("only_state_dict", [True, False])
 @magic_argv_env_context(timeout=100)
 def test_trainer_checkpoint_callback_1(
     model_and_optimizers: TrainerParameters,
     driver,
-    device
+    device,
+    version,
+    only_state_dict
 ):
-    for version in [0, 1]:
-        for only_state_dict in [True, False]:
-            try:
-                path = Path.cwd().joinpath(f"test_model_checkpoint")
-                path.mkdir(exist_ok=True, parents=True)
-
-                if version == 0:
-                    callbacks = [
-                        CheckpointCallback(folder=path, every_n_epochs=7, every_n_batches=123, last=False, on_exceptions=None, topk=0,
-                                           monitor=None, only_state_dict=only_state_dict, save_object='trainer')
-                    ]
-                elif version == 1:
-                    callbacks = [
-                        CheckpointCallback(folder=path, every_n_epochs=None, every_n_batches=None, last=True, on_exceptions=None,
-                                           topk=2, monitor="acc", only_state_dict=only_state_dict, save_object='trainer')
-                    ]
-
-                trainer = Trainer(
-                    model=model_and_optimizers.model,
-                    driver=driver,
-                    device=device,
-                    optimizers=model_and_optimizers.optimizers,
-                    train_dataloader=model_and_optimizers.train_dataloader,
-                    evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
-                    input_mapping=model_and_optimizers.input_mapping,
-                    output_mapping=model_and_optimizers.output_mapping,
-                    metrics=model_and_optimizers.metrics,
-
-                    n_epochs=10,
-                    callbacks=callbacks,
-                    output_from_new_proc="all"
-                )
-
-                trainer.run()
-
-                all_saved_model_paths = {w.name: w for w in path.joinpath(os.environ[FASTNLP_LAUNCH_TIME]).iterdir()}
-                # 检查生成保存模型文件的数量是不是正确的；
-                if version == 0:
-
-                    if not isinstance(device, list):
-                        assert "trainer-epoch_7" in all_saved_model_paths
-                        assert "trainer-epoch_4-batch_123" in all_saved_model_paths
-
-                        epoch_save_path = all_saved_model_paths["trainer-epoch_7"]
-                        step_save_path = all_saved_model_paths["trainer-epoch_4-batch_123"]
-
-                        assert len(all_saved_model_paths) == 3
-                    # ddp 下的文件名不同，因为同样的数据，ddp 用了更少的步数跑完；
-                    else:
-                        assert "trainer-epoch_7" in all_saved_model_paths
-                        assert "trainer-epoch_9-batch_123" in all_saved_model_paths
-
-                        epoch_save_path = all_saved_model_paths["trainer-epoch_7"]
-                        step_save_path = all_saved_model_paths["trainer-epoch_9-batch_123"]
-
-                        assert len(all_saved_model_paths) == 2
-                    all_state_dicts = [epoch_save_path, step_save_path]
-
-                elif version == 1:
-
-                    pattern = re.compile("trainer-epoch_[0-9]+-batch_[0-9]+-[a-zA-Z#]+_[0-9]*.?[0-9]*")
-
-                    # all_saved_model_paths = {w.name: w for w in path.joinpath(os.environ[FASTNLP_LAUNCH_TIME]).iterdir()}
-                    if not isinstance(device, list):
-                        assert "trainer-last" in all_saved_model_paths
-                        aLL_topk_folders = []
-                        for each_folder_name in all_saved_model_paths:
-                            each_folder_name = pattern.findall(each_folder_name)
-                            if len(each_folder_name) != 0:
-                                aLL_topk_folders.append(each_folder_name[0])
-                        assert len(aLL_topk_folders) == 2
-
-                        last_save_path = all_saved_model_paths["trainer-last"]
-                        topk_save_path = all_saved_model_paths[aLL_topk_folders[0]]
-
-                        assert len(all_saved_model_paths) == 3
-                    # ddp 下的文件名不同，因为同样的数据，ddp 用了更少的步数跑完；
-                    else:
-                        assert "trainer-last" in all_saved_model_paths
-
-                        aLL_topk_folders = []
-                        for each_folder_name in all_saved_model_paths:
-                            each_folder_name = pattern.findall(each_folder_name)
-                            if len(each_folder_name) != 0:
-                                aLL_topk_folders.append(each_folder_name[0])
-                        assert len(aLL_topk_folders) == 2
-
-                        last_save_path = all_saved_model_paths["trainer-last"]
-                        topk_save_path = all_saved_model_paths[aLL_topk_folders[0]]
-
-                        assert len(all_saved_model_paths) == 3
-
-                    all_state_dicts = [last_save_path, topk_save_path]
-
-                for folder in all_state_dicts:
-                    trainer = Trainer(
-                        model=model_and_optimizers.model,
-                        driver=driver,
-                        device=device,
-                        optimizers=model_and_optimizers.optimizers,
-                        train_dataloader=model_and_optimizers.train_dataloader,
-                        evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
-                        input_mapping=model_and_optimizers.input_mapping,
-                        output_mapping=model_and_optimizers.output_mapping,
-                        metrics=model_and_optimizers.metrics,
-
-                        n_epochs=13,
-                        output_from_new_proc="all"
-                    )
-                    trainer.load_checkpoint(folder, only_state_dict=only_state_dict)
-
-                    trainer.run()
-                    trainer.driver.barrier()
-
-            finally:
-                rank_zero_rm(path)
+    try:
+        path = Path.cwd().joinpath(f"test_model_checkpoint")
+        path.mkdir(exist_ok=True, parents=True)
 
-    if dist.is_initialized():
-        dist.destroy_process_group()
+        if version == 0:
+            callbacks = [
+                CheckpointCallback(folder=path, every_n_epochs=3, every_n_batches=17, last=False, on_exceptions=None, topk=0,
+                                   monitor=None, only_state_dict=only_state_dict, save_object='trainer')
+            ]
+        elif version == 1:
+            callbacks = [
+                CheckpointCallback(folder=path, every_n_epochs=None, every_n_batches=None, last=True, on_exceptions=None,
+                                   topk=2, monitor="acc", only_state_dict=only_state_dict, save_object='trainer')
+            ]
+
+        trainer = Trainer(
+            model=model_and_optimizers.model,
+            driver=driver,
+            device=device,
+            optimizers=model_and_optimizers.optimizers,
+            train_dataloader=model_and_optimizers.train_dataloader,
+            evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
+            input_mapping=model_and_optimizers.input_mapping,
+            output_mapping=model_and_optimizers.output_mapping,
+            metrics=model_and_optimizers.metrics,
+
+            n_epochs=4,
+            callbacks=callbacks,
+            output_from_new_proc="all"
+        )
+
+        trainer.run()
+
+        save_root = path.joinpath(os.environ[FASTNLP_LAUNCH_TIME])
+        all_saved_model_paths = _list_saved(save_root)
+        # 检查生成保存模型文件的数量是不是正确的；
+        if version == 0:
+
+            if not isinstance(device, list):
+                assert "trainer-epoch_3" in all_saved_model_paths
+                assert "trainer-epoch_1-batch_17" in all_saved_model_paths
+
+                epoch_save_path = all_saved_model_paths["trainer-epoch_3"]
+                step_save_path = all_saved_model_paths["trainer-epoch_1-batch_17"]
+
+                assert len(all_saved_model_paths) == 3
+            # ddp 下的文件名不同，因为同样的数据，ddp 用了更少的步数跑完；
+            else:
+                assert "trainer-epoch_3" in all_saved_model_paths
+                assert "trainer-epoch_3-batch_17" in all_saved_model_paths
+
+                epoch_save_path = all_saved_model_paths["trainer-epoch_3"]
+                step_save_path = all_saved_model_paths["trainer-epoch_3-batch_17"]
+
+                assert len(all_saved_model_paths) == 2
+            all_state_dicts = [epoch_save_path, step_save_path]
+
+        elif version == 1:
+
+            pattern = _TRAINER_TOPK_RE
+
+            if not isinstance(device, list):
+                assert "trainer-last" in all_saved_model_paths
+                aLL_topk_folders = list(callbacks[0].topk_paths)
+                # 与按照文件夹名字匹配得到的 topk 文件夹一致；
+                assert sorted(aLL_topk_folders) == sorted(_find_topk(pattern, all_saved_model_paths))
+                assert len(aLL_topk_folders) == 2
+
+                last_save_path = all_saved_model_paths["trainer-last"]
+                topk_save_path = all_saved_model_paths[aLL_topk_folders[0]]
+
+                assert len(all_saved_model_paths) == 3
+            # ddp 下的文件名不同，因为同样的数据，ddp 用了更少的步数跑完；
+            else:
+                assert "trainer-last" in all_saved_model_paths
+
+                aLL_topk_folders = list(callbacks[0].topk_paths)
+                # 与按照文件夹名字匹配得到的 topk 文件夹一致；
+                assert sorted(aLL_topk_folders) == sorted(_find_topk(pattern, all_saved_model_paths))
+                assert len(aLL_topk_folders) == 2
+
+                last_save_path = all_saved_model_paths["trainer-last"]
+                topk_save_path = all_saved_model_paths[aLL_topk_folders[0]]
+
+                assert len(all_saved_model_paths) == 3
+
+            all_state_dicts = [last_save_path, topk_save_path]
+
+        # 只用第一个保存的断点检验断点重训，其余的断点只需要检验其中的模型能够被正确加载并评测；
+        trainer = Trainer(
+            model=model_and_optimizers.model,
+            driver=driver,
+            device=device,
+            optimizers=model_and_optimizers.optimizers,
+            train_dataloader=model_and_optimizers.train_dataloader,
+            evaluate_dataloaders=model_and_optimizers.evaluate_dataloaders,
+            input_mapping=model_and_optimizers.input_mapping,
+            output_mapping=model_and_optimizers.output_mapping,
+            metrics=model_and_optimizers.metrics,
+
+            n_epochs=5,
+            output_from_new_proc="all"
+        )
+        trainer.load_checkpoint(all_state_dicts[0], only_state_dict=only_state_dict)
+        trainer.run()
+        trainer.driver.barrier()
+
+        evaluator = Evaluator(model=model_and_optimizers.model, driver=trainer.driver,
+                              dataloaders=model_and_optimizers.evaluate_dataloaders,
+                              input_mapping=model_and_optimizers.input_mapping,
+                              output_mapping=model_and_optimizers.output_mapping,
+                              metrics=model_and_optimizers.metrics)
+        # evaluator.run 在汇总 metric 时已经同步了所有进程，因此只需要在全部加载完成后 barrier 一次；
+        for folder in all_state_dicts[1:]:
+            evaluator.load_model(folder, only_state_dict=only_state_dict)
+            evaluator.run()
+        trainer.driver.barrier()
+        del trainer, evaluator
+
+    finally:
+        _rm_in_background(path)
+        _free_memory()
 
 
 @pytest.mark.torch
@@ -475,7 +742,8 @@ def test_load_state(model_and_optimizers):
         )
         trainer.run(num_eval_sanity_batch=0, num_train_batch_per_epoch=2)
 
-        all_saved_model_paths = {w.name: w for w in path.joinpath(os.environ[FASTNLP_LAUNCH_TIME]).iterdir()}
+        save_root = path.joinpath(os.environ[FASTNLP_LAUNCH_TIME])
+        all_saved_model_paths = _list_saved(save_root)
         epoch_2_path = all_saved_model_paths['trainer-epoch_2']
 
         callbacks = [StateCallback('new_callback1'), StateCallback('new_callback2')]
@@ -502,11 +770,12 @@ def test_load_state(model_and_optimizers):
         assert output[0].count('???')==1
 
     finally:
-        rank_zero_rm(path)
+        _rm_in_background(path)
         Trainer._custom_callbacks.clear()
 
 
 @pytest.mark.torch
+@pytest.mark.usefixtures("destroy_process_group")
 # 通过自己编写 model_save_fn 和 model_load_fn 来测试 huggingface 的 transformers 的模型的保存和加载；
 @pytest.mark.parametrize("driver,device", [("torch", [6, 7]), ("torch", 7)])  # ("torch", "cpu"), ("torch", [0, 1]), ("torch", 1)
 @pytest.mark.parametrize("version", [0, 1])
@@ -523,7 +792,12 @@ def test_trainer_checkpoint_callback_2(
     import transformers  # 版本4.16.2
     import torch
     from torchmetrics import Accuracy
-    from transformers import AutoModelForSequenceClassification
+    from transformers import AutoModelForSequenceClassification, WEIGHTS_NAME
+    try:
+        from transformers import SAFE_WEIGHTS_NAME
+    except ImportError:
+        # 较早版本的 transformers 只会保存为 WEIGHTS_NAME
+        SAFE_WEIGHTS_NAME = "model.safetensors"
 
     from fastNLP import Trainer
     from torch.optim import AdamW
@@ -625,8 +899,26 @@ def test_trainer_checkpoint_callback_2(
     def model_save_fn(folder):
         test_bert_model.save_pretrained(folder)
 
+    def load_weights(folder):
+        # 较新版本的 save_pretrained 默认保存为 safetensors ，否则保存为 WEIGHTS_NAME ；两种方式都是以 mmap 的方式将权重读到 cpu 上，
+        # 再由 load_state_dict 拷贝到模型所在的设备；
+        safe_weights_path = os.path.join(folder, SAFE_WEIGHTS_NAME)
+        if os.path.exists(safe_weights_path):
+            from safetensors.torch import load_file
+            states = load_file(safe_weights_path, device="cpu")
+        else:
+            states = torch.load(os.path.join(folder, WEIGHTS_NAME), map_location="cpu", weights_only=True, mmap=True)
+        test_bert_model.load_state_dict(states)
+
     def model_load_fn(folder):
-        test_bert_model.from_pretrained(folder)
+        # ddp 下只由 rank 0 从磁盘中读取权重，再广播给其它的进程，避免每个进程都去读取同一份文件；
+        if dist.is_initialized() and dist.get_world_size() > 1:
+            if dist.get_rank() == 0:
+                load_weights(folder)
+            for tensor in test_bert_model.state_dict().values():
+                dist.broadcast(tensor, src=0)
+        else:
+            load_weights(folder)
 
     if version == 0:
         callbacks = [
@@ -676,7 +968,8 @@ def test_trainer_checkpoint_callback_2(
 
         trainer.run()
 
-        all_saved_model_paths = {w.name: w for w in path.joinpath(os.environ[FASTNLP_LAUNCH_TIME]).iterdir()}
+        save_root = path.joinpath(os.environ[FASTNLP_LAUNCH_TIME])
+        all_saved_model_paths = _list_saved(save_root)
         # 检查生成保存模型文件的数量是不是正确的；
         if version == 0:
 
@@ -697,16 +990,13 @@ def test_trainer_checkpoint_callback_2(
 
         elif version == 1:
 
-            pattern = re.compile("trainer-epoch_[0-9]+-batch_[0-9]+-[a-zA-Z#]+_[0-9]*.?[0-9]*")
+            pattern = _TRAINER_TOPK_RE
 
-            # all_saved_model_paths = {w.name: w for w in path.joinpath(os.environ[FASTNLP_LAUNCH_TIME]).iterdir()}
             if not isinstance(device, list):
                 assert "trainer-last" in all_saved_model_paths
-                aLL_topk_folders = []
-                for each_folder_name in all_saved_model_paths:
-                    each_folder_name = pattern.findall(each_folder_name)
-                    if len(each_folder_name) != 0:
-                        aLL_topk_folders.append(each_folder_name[0])
+                aLL_topk_folders = list(callbacks[0].topk_paths)
+                # 与按照文件夹名字匹配得到的 topk 文件夹一致；
+                assert sorted(aLL_topk_folders) == sorted(_find_topk(pattern, all_saved_model_paths))
                 assert len(aLL_topk_folders) == 1
 
                 last_save_path = all_saved_model_paths["trainer-last"]
@@ -717,11 +1007,9 @@ def test_trainer_checkpoint_callback_2(
             else:
                 assert "trainer-last" in all_saved_model_paths
 
-                aLL_topk_folders = []
-                for each_folder_name in all_saved_model_paths:
-                    each_folder_name = pattern.findall(each_folder_name)
-                    if len(each_folder_name) != 0:
-                        aLL_topk_folders.append(each_folder_name[0])
+                aLL_topk_folders = list(callbacks[0].topk_paths)
+                # 与按照文件夹名字匹配得到的 topk 文件夹一致；
+                assert sorted(aLL_topk_folders) == sorted(_find_topk(pattern, all_saved_model_paths))
                 assert len(aLL_topk_folders) == 1
 
                 last_save_path = all_saved_model_paths["trainer-last"]
@@ -731,31 +1019,32 @@ def test_trainer_checkpoint_callback_2(
 
             all_state_dicts = [last_save_path, topk_save_path]
 
-        for folder in all_state_dicts:
-            trainer = Trainer(
-                model=test_bert_model,
-                driver=driver,
-                device=device,
-                n_epochs=3,
-                train_dataloader=test_bert_dataloader_train,
-                optimizers=test_bert_optimizers,
-
-                evaluate_dataloaders=test_bert_dataloader_validate,
-                input_mapping=bert_input_mapping,
-                output_mapping=bert_output_mapping,
-                metrics={"acc": acc},
-            )
-            trainer.load_checkpoint(folder, model_load_fn=model_load_fn)
+        # 只用第一个断点检验断点重训，其余的断点只需要检验模型加载后能够正常评测；
+        trainer = Trainer(
+            model=test_bert_model,
+            driver=driver,
+            device=device,
+            n_epochs=3,
+            train_dataloader=test_bert_dataloader_train,
+            optimizers=test_bert_optimizers,
 
-            trainer.run()
-            trainer.driver.barrier()
+            evaluate_dataloaders=test_bert_dataloader_validate,
+            input_mapping=bert_input_mapping,
+            output_mapping=bert_output_mapping,
+            metrics={"acc": acc},
+        )
+        trainer.load_checkpoint(all_state_dicts[0], model_load_fn=model_load_fn)
+        trainer.run()
+        trainer.driver.barrier()
+
+        for folder in all_state_dicts[1:]:
+            trainer.load_model(folder, model_load_fn=model_load_fn)
+            trainer.evaluator.run()
+        trainer.driver.barrier()
 
     finally:
-        rank_zero_rm(path)
+        _rm_in_background(path)
         # pass
 
-    if dist.is_initialized():
-        dist.destroy_process_group()
-
 
 
@@ -3,7 +3,7 @@ import os
 import pytest
 
 from fastNLP.core.drivers import PaddleSingleDriver, PaddleFleetDriver
-from fastNLP.core.drivers.paddle_driver.initialize_paddle_driver import initialize_paddle_driver
+from fastNLP.core.drivers.paddle_driver.initialize_paddle_driver import initialize_paddle_driver, _parse_visible_devices
 from fastNLP.envs import get_gpu_count
 from tests.helpers.models.paddle_model import PaddleNormalModel_Classification_1
 from tests.helpers.utils import magic_argv_env_context
@@ -66,3 +66,14 @@ def test_device_out_of_range(device):
     model = PaddleNormalModel_Classification_1(20, 10)
     with pytest.raises(ValueError):
         driver = initialize_paddle_driver("paddle", device, model)
+
+@pytest.mark.paddle
+@pytest.mark.parametrize(
+    ("visible_devices", "expected"),
+    [("0,1,2", [0, 1, 2]), ("3, 5", [3, 5]), ("GPU-8932f937,GPU-e3a1b3c2", [0, 1]), ("MIG-GPU-8932f937/1/0", [0])]
+)
+def test_parse_visible_devices(visible_devices, expected):
+    """
+    测试解析 CUDA_VISIBLE_DEVICES 的情况，包括 UUID 和 MIG 形式的设备名
+    """
+    assert _parse_visible_devices(visible_devices) == expected
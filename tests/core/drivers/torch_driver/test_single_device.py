@@ -10,6 +10,7 @@ from tests.helpers.datasets.torch_data import TorchNormalDataset, TorchNormalXYD
 from tests.helpers.datasets.paddle_data import PaddleNormalDataset
 from tests.helpers.models.paddle_model import PaddleNormalModel_Classification_1
 from fastNLP.envs.distributed import rank_zero_rm
+from fastNLP.envs import FASTNLP_CHECKPOINT_FILENAME
 from fastNLP.envs.imports import _NEED_IMPORT_PADDLE, _NEED_IMPORT_TORCH
 from fastNLP import prepare_torch_dataloader, BucketedBatchSampler
 
@@ -530,13 +531,13 @@ class TestSetDistReproDataloader:
 #
 ############################################################################
 
-def generate_random_driver(labels, features, fp16=False, device="cpu"):
+def generate_random_driver(labels, features, fp16=False, device="cpu", torch_kwargs=None):
     """
     生成driver
     """
     model = TorchNormalModel_Classification_1(labels, features)
     opt = torch.optim.Adam(params=model.parameters(), lr=0.01)
-    driver = TorchSingleDriver(model, device=device, fp16=fp16)
+    driver = TorchSingleDriver(model, device=device, fp16=fp16, torch_kwargs=torch_kwargs)
     driver.set_optimizers(opt)
     driver.setup()
 
@@ -566,6 +567,114 @@ def test_save_and_load_model(only_state_dict):
     finally:
         rank_zero_rm(path)
 
+@pytest.mark.torch
+def test_save_model_reuse_save_plan():
+    """
+    测试设置 reuse_save_buffers 后多次 save_model 时复用同一份 save plan 与 cpu 张量，并且每次保存的都是当前的权重；默认不保留
+    """
+    try:
+        path = "model"
+        driver = generate_random_driver(20, 1)
+        driver.save_model(path, only_state_dict=True)
+        assert driver._save_plan is None and driver._save_buffers is None
+
+        driver = generate_random_driver(20, 1, torch_kwargs={"reuse_save_buffers": True})
+
+        driver.save_model(path, only_state_dict=True)
+        plan, buffers = driver._save_plan, driver._save_buffers
+        with torch.no_grad():
+            for param in driver.model.parameters():
+                param.add_(1)
+        driver.save_model(path, only_state_dict=True)
+        assert driver._save_plan is plan and driver._save_buffers is buffers
+
+        states = torch.load(path)
+        for name, param in driver.model.state_dict().items():
+            assert torch.equal(states[name], param)
+    finally:
+        rank_zero_rm(path)
+
+@pytest.mark.torch
+def test_save_model_with_save_dtype():
+    """
+    测试 save_model 时通过 save_dtype 转换浮点权重的类型，并且可以正常加载回原本的模型
+    """
+    try:
+        path = "model"
+        driver1, driver2 = generate_random_driver(20, 1), generate_random_driver(20, 1)
+
+        driver1.save_model(path, only_state_dict=True, save_dtype=torch.bfloat16)
+        states = torch.load(path)
+        for name, param in driver1.model.state_dict().items():
+            if param.is_floating_point():
+                assert states[name].dtype == torch.bfloat16
+            assert torch.equal(states[name], param.to(states[name].dtype))
+
+        driver2.load_model(path, only_state_dict=True)
+        for name, param in driver2.model.state_dict().items():
+            assert param.dtype == driver1.model.state_dict()[name].dtype
+            assert torch.equal(param, states[name].to(param.dtype))
+    finally:
+        rank_zero_rm(path)
+
+@pytest.mark.torch
+def test_load_model_with_mmap():
+    """
+    测试 load_model 以 mmap 的方式读取只保存了权重的文件，以及文件中保存的是整个模型时能够回退到普通的读取方式
+    """
+    try:
+        path = "model"
+        driver1, driver2 = generate_random_driver(20, 1), generate_random_driver(20, 1)
+
+        driver1.save_model(path, only_state_dict=True)
+        states = driver2._load_state_file(path)
+        for name, param in driver1.model.state_dict().items():
+            assert torch.equal(states[name], param)
+
+        driver2.load_model(path, only_state_dict=True)
+        for name, param in driver2.model.state_dict().items():
+            assert torch.equal(param, driver1.model.state_dict()[name])
+
+        driver1.save_model(path, only_state_dict=False)
+        assert driver2._load_state_file(path) is None
+    finally:
+        rank_zero_rm(path)
+
+@pytest.mark.torch
+def test_save_checkpoint_with_optimizer_save_dtype():
+    """
+    测试 save_checkpoint 时通过 optimizer_save_dtype 转换优化器的浮点状态，并且加载后会转换回参数本身的类型
+    """
+    try:
+        path = "model.ckp"
+        driver1, driver2 = generate_random_driver(20, 1), generate_random_driver(20, 1)
+        dataset = TorchNormalXYDataset(20)
+        dataloader = dataloader_with_randomsampler(dataset, 4, True, False)
+        batch = next(iter(dataloader))
+        driver1.optimizers[0].zero_grad()
+        driver1.model(batch["x"]).sum().backward()
+        driver1.optimizers[0].step()
+
+        save_states = {"num_consumed_batches": 1}
+        driver1.save_checkpoint(Path(path), save_states, dataloader, only_state_dict=True, should_save_model=True,
+                                optimizer_save_dtype=torch.bfloat16)
+        states = torch.load(Path(path).joinpath(FASTNLP_CHECKPOINT_FILENAME), weights_only=False)
+        original_state = driver1.optimizers[0].state_dict()["state"]
+        for idx, param_state in states["optimizers_state_dict"]["optimizer0"]["state"].items():
+            assert param_state["step"].dtype == original_state[idx]["step"].dtype
+            assert param_state["step"] == original_state[idx]["step"]
+            for name in ["exp_avg", "exp_avg_sq"]:
+                assert param_state[name].dtype == torch.bfloat16
+                assert torch.equal(param_state[name], original_state[idx][name].to(torch.bfloat16))
+
+        dataloader = dataloader_with_randomsampler(dataset, 4, True, False)
+        driver2.load_checkpoint(Path(path), dataloader, only_state_dict=True, should_load_model=True)
+        for idx, param_state in driver2.optimizers[0].state_dict()["state"].items():
+            for name in ["exp_avg", "exp_avg_sq"]:
+                assert param_state[name].dtype == original_state[idx][name].dtype
+    finally:
+        rank_zero_rm(path)
+
 @pytest.mark.torch
 @pytest.mark.parametrize("only_state_dict", ([True, False]))
 @pytest.mark.parametrize("fp16", ([True, False]))
@@ -3,12 +3,14 @@ import pytest
 from fastNLP.core.drivers.torch_driver.utils import (
     replace_batch_sampler,
     replace_sampler,
+    optimizer_state_to_device,
 )
 from fastNLP.core.samplers import ReproduceBatchSampler, RandomSampler
 from fastNLP.envs.imports import _NEED_IMPORT_TORCH
 from tests.helpers.datasets.torch_data import TorchNormalDataset
 
 if _NEED_IMPORT_TORCH:
+    import torch
     from torch.utils.data import DataLoader, BatchSampler
 
 @pytest.mark.torch
@@ -36,4 +38,18 @@ def test_replace_sampler():
 
     assert not (replaced_loader is dataloader)
     assert isinstance(replaced_loader.batch_sampler, BatchSampler)
-    assert isinstance(replaced_loader.batch_sampler.sampler, RandomSampler)
\ No newline at end of file
+    assert isinstance(replaced_loader.batch_sampler.sampler, RandomSampler)
+
+
+@pytest.mark.torch
+def test_optimizer_state_to_device():
+    """
+    测试迁移后的 optimizer 状态是一份新的张量，修改原本的状态不会影响迁移后的结果
+    """
+    state = {0: {"step": 3, "exp_avg": torch.ones(4)}}
+    new_state = optimizer_state_to_device(state, torch.device("cpu"))
+
+    assert new_state[0]["step"] == 3
+    assert new_state[0]["exp_avg"].data_ptr() != state[0]["exp_avg"].data_ptr()
+    state[0]["exp_avg"].add_(1)
+    assert torch.equal(new_state[0]["exp_avg"], torch.ones(4))
@@ -1,3 +1,4 @@
+import inspect
 import pytest
 
 from fastNLP.core.metrics import Metric
@@ -25,6 +26,13 @@ class MyMetric(Metric):
         return {"t1": self.t1.get_scalar(), "t2": self.t2.get_scalar(), "t3": self.t3.get_scalar()}
 
 
+class MySubMetric(MyMetric):
+    def get_metric(self) -> dict:
+        res = super().get_metric()
+        res['t4'] = res['t1'] + res['t3']
+        return res
+
+
 class TestElemnt:
 
     @pytest.mark.torch
@@ -33,4 +41,81 @@ class TestElemnt:
         metric = MyMetric()
         metric.update(pred)
         res = metric.get_metric()
-        print(res)
\ No newline at end of file
+        print(res)
+
+    @pytest.mark.torch
+    def test_subclass_wrap_once(self):
+        pred = torch.tensor([1, 1, 1, 1])
+        metric = MySubMetric()
+        # 方法在类上只包裹一次，不会因为继承而重复包裹
+        assert MySubMetric.update is MyMetric.update
+        assert MySubMetric.reset is MyMetric.reset
+        # 通过实例访问时 __wrapped__ 为绑定到该实例上的原始方法
+        assert metric.update.__wrapped__.__self__ is metric
+        assert list(inspect.signature(metric.update.__wrapped__).parameters) == ['pred']
+        metric.update(pred)
+        res = metric.get_metric()
+        assert res == {"t1": 2.0, "t2": 4, "t3": 8, "t4": 10.0}
+        metric.reset()
+        assert metric.t3.get_scalar() == 0
+
+    @pytest.mark.torch
+    def test_metric_attributes_in_slots(self):
+        metric = MyMetric()
+        # Metric 自身的属性保存在 slots 中，实例的 __dict__ 只保存 element 与子类的属性
+        for name in Metric.__slots__:
+            assert name not in metric.__dict__
+        assert {'t1', 't2', 't3'} <= set(metric.__dict__)
+
+    @pytest.mark.torch
+    def test_slotted_subclass(self):
+        # 声明了 __slots__ 的子类依然可以注册 element 并确定 backend
+        class SlottedMetric(Metric):
+            __slots__ = ('extra',)
+
+            def __init__(self):
+                super().__init__()
+                self.register_element(name="total", value=0)
+
+            def update(self, pred):
+                self.total += len(pred)
+
+            def get_metric(self) -> dict:
+                return {"total": self.total.get_scalar()}
+
+        metric = SlottedMetric()
+        metric.extra = 1
+        metric.update(torch.tensor([1, 1]))
+        assert metric.get_metric() == {"total": 2}
+        assert 'extra' not in metric.__dict__
+
+    @pytest.mark.torch
+    def test_sync_recover_keeps_int_precision(self):
+        # element 的值为 int64 时，sync 结束后恢复的值不应该因为转换为 float 而损失精度
+        metric = MyMetric()
+        metric.update(torch.tensor([1, 1]))
+        metric.t2._value = torch.tensor([2 ** 53 + 1])
+        with metric.sync(recover=True, aggregate=True):
+            pass
+        assert metric.t2.get_scalar() == 2 ** 53 + 1
+
+    @pytest.mark.torch
+    def test_specified_backend_shared(self):
+        class BackendMetric(Metric):
+            def __init__(self):
+                super().__init__(backend='torch')
+                self.register_element(name="t1", value=0)
+                self.register_element(name="t2", value=0, backend='torch')
+
+            def update(self, pred):
+                self.t1 += len(pred)
+
+            def get_metric(self) -> dict:
+                return {"t1": self.t1.get_scalar()}
+
+        metric = BackendMetric()
+        another = BackendMetric()
+        # 指定了具体框架的 backend 在 Metric 与 Element 之间共享同一个对象
+        assert metric.t1.backend is metric.backend
+        assert metric.t2.backend is metric.backend
+        assert another.backend is metric.backend